@@ -0,0 +1,147 @@
+from django.db import transaction
+from django.urls import reverse
+
+from panelapi.models import Product
+from panelapi.invoices import invoice_period, allocate_invoice_numbers, release_invoice_numbers
+
+from .orders import (
+    InvalidOrder,
+    parse_order_data,
+    order_product_ids,
+    check_order_products,
+    create_order,
+)
+from .specifications import resolve_specification_names
+from .idempotency import (
+    IDEMPOTENCY_KEY_MAX_LENGTH,
+    DuplicateIdempotencyKey,
+    find_idempotency_record,
+    claim_idempotency_key,
+)
+
+
+# Orders written per transaction when the client does not ask for a chunk size
+BATCH_DEFAULT_CHUNK_SIZE = 100
+BATCH_MAX_CHUNK_SIZE = 500
+
+# Upper bound on orders accepted by a single batch request
+BATCH_MAX_ORDERS = 1000
+
+
+def _placed_result(index, order, replayed=False):
+    # Bills are not rendered here; the counter fetches them from bill_url when it needs to print
+    return {
+        'index': index,
+        'error': False,
+        'replayed': replayed,
+        'order_number': order.order_number,
+        'invoice_number': order.invoice_number,
+        'bill_url': reverse('generate_bill', args=[order.order_number]),
+    }
+
+
+def _failed_result(index, detail):
+    return {'index': index, 'error': True, 'detail': detail}
+
+
+def _idempotency_key(data):
+    key = str(data.get('idempotency_key') or '').strip()
+    if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise InvalidOrder(f'idempotency_key must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters')
+    return key or None
+
+
+def place_order_batch(outlet, orders, chunk_size=BATCH_DEFAULT_CHUNK_SIZE):
+    """
+    Place a list of order payloads for an outlet, `chunk_size` orders per transaction.
+
+    Returns one result per order, in request order. A failing order never
+    takes the rest of its chunk down with it.
+    """
+    results = [None] * len(orders)
+
+    for start in range(0, len(orders), chunk_size):
+        chunk = list(enumerate(orders[start:start + chunk_size], start))
+        _place_chunk(outlet, chunk, results)
+
+    return results
+
+
+def _place_chunk(outlet, chunk, results):
+    # --- Validate payloads and replay orders that were already placed ---
+    prepared = []
+    for index, data in chunk:
+        try:
+            if not isinstance(data, dict):
+                raise InvalidOrder('Order must be an object')
+
+            key = _idempotency_key(data)
+            if key:
+                record = find_idempotency_record(outlet.id, key)
+                if record is not None:
+                    results[index] = _placed_result(index, record.order, replayed=True)
+                    continue
+
+            order_data = parse_order_data(data)
+            order_product_ids(order_data['items'])
+            prepared.append((index, order_data, key))
+        except Exception as e:
+            # Any malformed payload fails only its own order; earlier chunks are already committed
+            results[index] = _failed_result(index, str(e))
+
+    if not prepared:
+        return
+
+    # --- Shared lookups: one product query and one query per specification table for the chunk ---
+    product_ids = {
+        product_id
+        for _, order_data, _ in prepared
+        for product_id in order_product_ids(order_data['items'])
+    }
+    products = Product.objects.in_bulk(product_ids)
+
+    valid = []
+    for index, order_data, key in prepared:
+        try:
+            check_order_products(order_data['items'], products)
+            valid.append((index, order_data, key))
+        except InvalidOrder as e:
+            results[index] = _failed_result(index, str(e))
+
+    if not valid:
+        return
+
+    with transaction.atomic():
+        resolved_specifications = resolve_specification_names(
+            [item for _, order_data, _ in valid for item in order_data['items']]
+        )
+
+        # Reserve one block of invoice numbers for the whole chunk
+        period = invoice_period()
+        invoice_numbers = allocate_invoice_numbers(outlet.id, len(valid), period)
+        used = 0
+
+        for index, order_data, key in valid:
+            try:
+                # Each order gets its own savepoint so a failure only rolls back that order
+                with transaction.atomic():
+                    order, customer, order_items = create_order(
+                        outlet, order_data, products, resolved_specifications, invoice_numbers[used]
+                    )
+                    if key:
+                        claim_idempotency_key(outlet, key, order)
+                used += 1
+                results[index] = _placed_result(index, order)
+
+            except DuplicateIdempotencyKey:
+                record = find_idempotency_record(outlet.id, key)
+                if record is None:
+                    results[index] = _failed_result(index, 'A request with this idempotency_key is already being processed')
+                else:
+                    results[index] = _placed_result(index, record.order, replayed=True)
+
+            except Exception as e:
+                results[index] = _failed_result(index, str(e))
+
+        # Numbers are consumed in order, so whatever is left is the tail of the block
+        release_invoice_numbers(outlet.id, len(invoice_numbers) - used, period)
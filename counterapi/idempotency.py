@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.timezone import now
+
+from panelapi.models import IdempotencyKey
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class InvalidIdempotencyKey(Exception):
+    """Raised when the Idempotency-Key header is malformed."""
+
+
+class DuplicateIdempotencyKey(Exception):
+    """Raised when another request already claimed the same Idempotency-Key."""
+
+
+def get_idempotency_key(request):
+    """Read the Idempotency-Key header, or None when the client did not send one."""
+    key = request.headers.get(IDEMPOTENCY_HEADER, '').strip()
+    if not key:
+        return None
+    if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise InvalidIdempotencyKey(f'{IDEMPOTENCY_HEADER} must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters')
+    return key
+
+
+def find_idempotency_record(outlet_id, key):
+    """Return the live record for a key, dropping it first if its TTL has passed."""
+    records = IdempotencyKey.objects.filter(outlet_id=outlet_id, key=key)
+    records.filter(expires_at__lte=now()).delete()
+    return records.select_related('order').first()
+
+
+def claim_idempotency_key(outlet, key, order):
+    """
+    Bind a key to a freshly created order. Must run inside the order's transaction
+    so a concurrent duplicate rolls back its whole order instead of committing it.
+    """
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                key=key,
+                outlet=outlet,
+                order=order,
+                expires_at=now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+            )
+    except IntegrityError:
+        raise DuplicateIdempotencyKey(key)
+
+
+def store_idempotent_response(record, response_data):
+    """Persist the response so replays return it without re-rendering the bill."""
+    record.response = response_data
+    record.save(update_fields=['response'])
@@ -0,0 +1,195 @@
+import random
+import string
+
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection
+from django.utils.timezone import localdate
+
+from panelapi.models import (
+    Product,
+    Customer,
+    Order,
+    OrderItem,
+    OrderItemSpecification,
+)
+
+from panelapi.pricing import line_total, price_order, apply_price
+from panelapi.rollups import record_order_sales
+from panelapi.specifications import intern_specifications
+
+from .specifications import specification_lookups
+
+
+class InvalidOrder(Exception):
+    """Raised when an order payload cannot be placed."""
+
+
+class InvalidOrderItem(InvalidOrder):
+    """Raised when an order item references data that does not exist."""
+
+
+def parse_order_data(data):
+    """Validate and normalise the body of a place-order request."""
+    items = data.get('order_items')
+    if not items:
+        raise InvalidOrder('Order items are required')
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise InvalidOrder('Order items must be a list of objects')
+
+    try:
+        discount_percentage = Decimal(data.get('discount_percentage', 0.0)).quantize(Decimal('0.00'))
+    except (TypeError, ValueError, InvalidOperation):
+        raise InvalidOrder('Invalid discount percentage')
+
+    # Parse and format date_of_collection
+    date_of_collection = data.get('date_of_collection')
+    if date_of_collection:
+        try:
+            date_of_collection = datetime.fromisoformat(date_of_collection).date()
+        except (TypeError, ValueError):
+            raise InvalidOrder('Invalid date format. Use ISO 8601 format.')
+
+    return {
+        'customer_phone': data.get('customer_phone'),
+        'date_of_collection': date_of_collection,
+        'discount_percentage': discount_percentage,
+        'mode_of_payment': data.get('mode_of_payment', 'CASH'),
+        'items': items,
+    }
+
+
+def generate_order_number():
+    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=12))
+
+
+def order_product_ids(items):
+    """Product ids referenced by the order items, as integers."""
+    product_ids = []
+    for item in items:
+        product_id = item.get('product_id')
+        try:
+            product_ids.append(int(product_id))
+        except (TypeError, ValueError):
+            raise InvalidOrderItem(f'Product with ID {product_id} not found')
+    return product_ids
+
+
+def check_order_products(items, products):
+    """Make sure every product referenced by the order items was found."""
+    for product_id in order_product_ids(items):
+        if product_id not in products:
+            raise InvalidOrderItem(f'Product with ID {product_id} not found')
+
+
+def fetch_order_products(items):
+    """Fetch every product referenced by the order items with a single in_bulk query."""
+    products = Product.objects.in_bulk(order_product_ids(items))
+    check_order_products(items, products)
+    return products
+
+
+def _bulk_insert(model, objs):
+    """bulk_create that guarantees primary keys are set on the returned objects."""
+    if connection.features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(objs)
+
+    # Backends that cannot return ids from a bulk insert fall back to one insert per row
+    for obj in objs:
+        obj.save(force_insert=True)
+    return objs
+
+
+def write_order_items(order, items, products, resolved_specifications):
+    """
+    Build the OrderItem rows for an order in memory and insert them with one
+    bulk_create. Specifications are interned: items with the same specs
+    share one OrderItemSpecification row, and only new combinations are inserted.
+
+    Returns the created OrderItem instances (with product, specification and
+    its lookup names attached) so totals, the response and the bill can be
+    built without reading them back.
+    """
+    order_items = []
+    specifications = []
+
+    for item in items:
+        product = products[int(item.get('product_id'))]
+        quantity = Decimal(item.get('quantity', 1)).quantize(Decimal('0.00'))
+        total = line_total(product.rate_per_unit, quantity)
+
+        # --- Specification from NAMES (already resolved to ids for the whole order) ---
+        spec_data = item.get('specification')
+        specification = None
+
+        if isinstance(spec_data, dict):
+            specification = OrderItemSpecification(
+                **specification_lookups(spec_data, resolved_specifications),
+                box=spec_data.get('box', False),
+                fold=spec_data.get('fold', False),
+            )
+            specifications.append(specification)
+
+        order_items.append(OrderItem(
+            order=order,
+            product=product,
+            quantity=int(quantity),  # the column is an integer; keep the in-memory value identical
+            total=total,
+            hanger=item.get('hanger', False),
+            specification=specification,
+        ))
+
+    if specifications:
+        intern_specifications(specifications)
+
+    # bulk_create copies the interned specification ids onto specification_id
+    return _bulk_insert(OrderItem, order_items)
+
+
+def apply_order_totals(order, order_items, customer):
+    """Price the order from its in-memory items with the shared pricing engine."""
+    price = price_order(
+        [order_item.total for order_item in order_items],
+        order.discount_percentage,
+        customer.state if customer else "",
+    )
+    apply_price(order, price)
+
+
+def create_order(outlet, order_data, products, resolved_specifications, invoice_number):
+    """
+    Write an order, its items and specifications. Must run inside a transaction.
+
+    `order_data` comes from parse_order_data; products and specification ids are
+    resolved up front by the caller so several orders can share those lookups.
+    Returns (order, customer, order_items).
+    """
+    # Validate customer
+    customer = None
+    if order_data['customer_phone']:
+        customer, created = Customer.objects.get_or_create(
+            phone_number=order_data['customer_phone'], defaults={'name': 'Unknown'}
+        )
+
+    order = Order.objects.create(
+        order_number=generate_order_number(),
+        outlet=outlet,
+        customer=customer,
+        date_of_billing=localdate(),  # what the `now` default is stored as, but as a date in memory too
+        date_of_collection=order_data['date_of_collection'],
+        total_amount=Decimal('0.00'),  # will update later
+        discount_percentage=order_data['discount_percentage'],
+        mode_of_payment=order_data['mode_of_payment'],
+        invoice_number=invoice_number,
+    )
+
+    # Insert all items and specifications in bulk and total them from the in-memory rows
+    order_items = write_order_items(order, order_data['items'], products, resolved_specifications)
+    apply_order_totals(order, order_items, customer)
+    order.save()
+
+    # Count the order in the daily sales rollup within the same transaction
+    record_order_sales(order, order_items)
+
+    return order, customer, order_items
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.db.models import Prefetch
 from panelapi.models import (
     Category,
     Product,
@@ -58,6 +59,21 @@ class ProductSerializer(serializers.ModelSerializer):
 
 
 
+class ProductSyncSerializer(serializers.ModelSerializer):
+    """Product row as stored by counters; includes the category id for offline filtering."""
+    class Meta:
+        model = Product
+        fields = ['id', 'item_name', 'rate_per_unit', 'hsn_sac_code', 'category', 'updated_at']
+
+
+class CategorySyncSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'updated_at']
+
+
+
+
 class CustomerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Customer
@@ -114,6 +130,14 @@ class OrderSerializer(serializers.ModelSerializer):
     # now read_only so it’s returned in responses
     order_items = OrderItemSerializer(many=True, read_only=True)
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load the nested items and their specifications with one prefetch query."""
+        # outlet, customer, product and the specification lookups are rendered as ids only
+        return queryset.prefetch_related(
+            Prefetch('order_items', queryset=OrderItem.objects.select_related('specification'))
+        )
+
     class Meta:
         model = Order
         fields = [
@@ -0,0 +1,103 @@
+from panelapi.catalog import invalidate_catalog
+from panelapi.models import (
+    Brand,
+    Pattern,
+    StainType,
+    DefectType,
+    MaterialType,
+    StarchType,
+    DetergentType,
+    DetergentScentType,
+    WashTemperatureType,
+    FabricSoftenerType,
+    Colour,
+    TopUpService,
+)
+
+
+# Specification keys accepted in an order item, mapped to their lookup model.
+# The key is also the name of the ForeignKey on OrderItemSpecification.
+SPECIFICATION_MODELS = {
+    "brand": Brand,
+    "pattern": Pattern,
+    "stain_type": StainType,
+    "defect_type": DefectType,
+    "material_type": MaterialType,
+    "starch_type": StarchType,
+    "detergent_type": DetergentType,
+    "detergent_scent_type": DetergentScentType,
+    "wash_temperature_type": WashTemperatureType,
+    "fabric_softener_type": FabricSoftenerType,
+    "colour": Colour,
+    "top_up_service": TopUpService,
+}
+
+
+def specification_name(value):
+    """Lookup name for a specification value: numbers and padded strings are accepted, as get_or_create did."""
+    return str(value).strip() if value else ""
+
+
+def collect_specification_names(items):
+    """Collect the distinct specification names used across all order items."""
+    names = {key: set() for key in SPECIFICATION_MODELS}
+
+    for item in items:
+        spec_data = item.get('specification')
+        if not isinstance(spec_data, dict):
+            continue
+
+        for key in SPECIFICATION_MODELS:
+            name = specification_name(spec_data.get(key))
+            if name:
+                names[key].add(name)
+
+    return names
+
+
+def resolve_specification_names(items):
+    """
+    Resolve every specification name in the order items to its lookup row id.
+
+    Runs one query per lookup table that is actually referenced, creates the
+    missing names in bulk, and returns a {key: {name: id}} map.
+    """
+    resolved = {key: {} for key in SPECIFICATION_MODELS}
+    created = False
+
+    for key, names in collect_specification_names(items).items():
+        if not names:
+            continue
+
+        model = SPECIFICATION_MODELS[key]
+        found = dict(model.objects.filter(name__in=names).values_list('name', 'id'))
+
+        missing = names - found.keys()
+        if missing:
+            # ignore_conflicts keeps a concurrent order creating the same name from failing this one
+            model.objects.bulk_create([model(name=name) for name in missing], ignore_conflicts=True)
+            found.update(model.objects.filter(name__in=missing).values_list('name', 'id'))
+            created = True
+
+        resolved[key] = found
+
+    if created:
+        # bulk_create skips the signals that retire the cached catalog snapshots listing these names
+        invalidate_catalog()
+
+    return resolved
+
+
+def specification_lookups(spec_data, resolved):
+    """
+    Map a single item's specification dict to OrderItemSpecification FK kwargs.
+
+    The lookup rows are passed as unsaved stand-ins built from the resolved
+    {name: id} map, so `specification.brand.name` etc. can be read without a query.
+    """
+    lookups = {}
+    for key, model in SPECIFICATION_MODELS.items():
+        name = specification_name(spec_data.get(key))
+        lookup_id = resolved[key].get(name) if name else None
+        lookups[key] = model(id=lookup_id, name=name) if lookup_id else None
+    return lookups
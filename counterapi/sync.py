@@ -0,0 +1,140 @@
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from panelapi.changelog import SYNC_MODELS, SYNC_TOMBSTONE_RETENTION_DAYS
+from panelapi.models import Category, Product, SyncTombstone
+
+from .serializers import (
+    ProductSerializer,
+    CategorySyncSerializer,
+    ProductSyncSerializer,
+    BrandSerializer,
+    PatternSerializer,
+    StainTypeSerializer,
+    DefectTypeSerializer,
+    MaterialTypeSerializer,
+    StarchTypeSerializer,
+    DetergentTypeSerializer,
+    DetergentScentTypeSerializer,
+    WashTemperatureTypeSerializer,
+    FabricSoftenerTypeSerializer,
+    ColourSerializer,
+    TopUpServiceSerializer,
+)
+
+
+SYNC_SERIALIZERS = {
+    "categories": CategorySyncSerializer,
+    "products": ProductSyncSerializer,
+    "brands": BrandSerializer,
+    "patterns": PatternSerializer,
+    "stain_types": StainTypeSerializer,
+    "defect_types": DefectTypeSerializer,
+    "material_types": MaterialTypeSerializer,
+    "starch_types": StarchTypeSerializer,
+    "detergent_types": DetergentTypeSerializer,
+    "detergent_scent_types": DetergentScentTypeSerializer,
+    "wash_temperature_types": WashTemperatureTypeSerializer,
+    "fabric_softener_types": FabricSoftenerTypeSerializer,
+    "colours": ColourSerializer,
+    "topup_services": TopUpServiceSerializer,
+}
+
+# Specification lookup tables sent in the bootstrap bundle, under their sync keys
+BOOTSTRAP_SPECIFICATIONS = [key for key in SYNC_SERIALIZERS if key not in ("categories", "products")]
+
+# Changes committed by transactions that were still open when a cursor was issued can carry
+# a timestamp slightly before it; re-sending this window guarantees they are never missed
+SYNC_CURSOR_OVERLAP = timedelta(seconds=5)
+
+
+class InvalidSyncCursor(Exception):
+    """Raised when the `since` cursor is not an ISO 8601 timestamp."""
+
+
+def parse_sync_cursor(value):
+    """Parse a `since` cursor returned by a previous sync, or None when the client has none."""
+    if not value:
+        return None
+    try:
+        # An unencoded "+" in the UTC offset arrives as a space in the query string
+        since = parse_datetime(value.strip().replace(' ', '+'))
+    except ValueError:
+        since = None
+    if since is None:
+        raise InvalidSyncCursor('Invalid since cursor. Use the cursor returned by the previous sync.')
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, dt_timezone.utc)
+    return since
+
+
+def _catalog_queryset(key, outlet):
+    queryset = SYNC_MODELS[key].objects.all()
+    if key == "products":
+        # Counters only hold the products assigned to their outlet
+        queryset = queryset.filter(outlets=outlet)
+    return queryset.order_by('pk')
+
+
+def build_sync_payload(outlet, since=None):
+    """
+    Catalog and master-data rows changed or deleted after `since` for an outlet.
+
+    Without a cursor (or with one older than the tombstone retention) every row
+    is returned and `full` is set, telling the counter to replace its copy.
+    """
+    cursor = timezone.now()
+    full = since is None or since < cursor - timedelta(days=SYNC_TOMBSTONE_RETENTION_DAYS)
+
+    # All tombstones in the window, for every table, in one query
+    tombstones = defaultdict(set)
+    if not full:
+        window = since - SYNC_CURSOR_OVERLAP
+        deleted_rows = SyncTombstone.objects.filter(deleted_at__gt=window).filter(
+            Q(outlet__isnull=True) | Q(outlet=outlet)
+        ).values_list('model', 'object_id')
+        for key, object_id in deleted_rows:
+            tombstones[key].add(object_id)
+
+    changes = {}
+    for key, serializer_class in SYNC_SERIALIZERS.items():
+        queryset = _catalog_queryset(key, outlet)
+        if not full:
+            queryset = queryset.filter(updated_at__gt=window)
+
+        deleted = tombstones.get(key, set())
+        if deleted:
+            # A product removed and then re-added to the outlet is still live; keep it out of `deleted`
+            deleted -= set(_catalog_queryset(key, outlet).filter(pk__in=deleted).values_list('pk', flat=True))
+
+        changes[key] = {
+            "changed": serializer_class(queryset, many=True).data,
+            "deleted": sorted(deleted),
+        }
+
+    return {
+        "cursor": cursor.isoformat(),
+        "full": full,
+        "changes": changes,
+    }
+
+
+def build_bootstrap_payload(outlet):
+    """
+    Everything a counter loads when it starts, in one payload: the category
+    names, the outlet's products and every specification list, each in the
+    shape its own endpoint returns (categories/, get-products/<outlet_id>/,
+    brands/ ...). One query per table.
+    """
+    payload = {
+        "error": False,
+        "categories": list(Category.objects.values_list('name', flat=True)),
+        "products": ProductSerializer(Product.objects.filter(outlets=outlet), many=True).data,
+    }
+    for key in BOOTSTRAP_SPECIFICATIONS:
+        payload[key] = SYNC_SERIALIZERS[key](SYNC_MODELS[key].objects.all().order_by('name'), many=True).data
+    return payload
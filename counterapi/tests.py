@@ -1,3 +1,164 @@
+import json
+
+from decimal import Decimal
+from unittest import mock
+
 from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from panelapi.customers import CustomerLookupCache, customer_lookup_cache, invalidate_phone_numbers
+from panelapi.models import Outlet, Category, Product, Customer, Order
+from panelapi.specifications import specification_cache
+
 
 # Create your tests here.
+class OrderTestCase(TestCase):
+    """An outlet with two products and a customer, and a helper to place orders for it."""
+
+    def setUp(self):
+        # Ids cached by committed callbacks in another test point at rolled-back rows
+        specification_cache.clear()
+        self.client = APIClient()
+        self.outlet = Outlet.objects.create(
+            owner_name="Owner", company_owned="Laundry Talks", location="Noida",
+            address="Sector 18", owner_details="-",
+        )
+        category = Category.objects.create(name="Wash & Iron")
+        self.products = [
+            Product.objects.create(item_name="Shirt", rate_per_unit=Decimal("50.00"), hsn_sac_code="9997", category=category),
+            Product.objects.create(item_name="Saree", rate_per_unit=Decimal("120.00"), hsn_sac_code="9997", category=category),
+        ]
+        for product in self.products:
+            product.outlets.add(self.outlet)
+        Customer.objects.create(name="Customer", phone_number="9876543210", state="Uttar Pradesh", outlet=self.outlet)
+
+    def place_order(self, item_count):
+        order_items = [
+            {
+                "product_id": self.products[i % 2].id,
+                "quantity": 2,
+                "hanger": True,
+                "specification": {"brand": "Raymond", "pattern": "Checked" if i % 2 else "Plain", "colour": "Blue", "fold": True},
+            }
+            for i in range(item_count)
+        ]
+        return self.client.post(
+            reverse("place_order", args=[self.outlet.id]),
+            {"customer_phone": "9876543210", "discount_percentage": 10, "order_items": order_items},
+            format="json",
+        )
+
+
+class PlaceOrderQueryCountTests(OrderTestCase):
+    """place_order must not read anything back after writing the order (N+1 regression)."""
+
+    # outlet, 2 savepoints (+2 releases), products, 3 specification lookups,
+    # invoice sequence lock + update, customer, order, interned specification lookup, items, order totals,
+    # daily sales rollup
+    PLACE_ORDER_QUERIES = 17
+
+    def test_query_count_is_constant(self):
+        # First order creates the specification names and the invoice sequence row
+        self.assertEqual(self.place_order(2).status_code, 201)
+
+        for item_count in (1, 25):
+            with self.assertNumQueries(self.PLACE_ORDER_QUERIES):
+                response = self.place_order(item_count)
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.data["order_details"]["order_items"]), item_count)
+
+    def test_response_built_from_written_rows(self):
+        response = self.place_order(2)
+        self.assertEqual(response.status_code, 201)
+
+        order = Order.objects.get()
+        item = response.data["order_details"]["order_items"][0]
+        self.assertEqual(response.data["order_details"]["orderNo/InvoieNo"], order.invoice_number)
+        self.assertEqual(item["quantity"], 2)
+        self.assertEqual(item["specifications"]["brand"], "Raymond")
+        self.assertEqual(item["specifications"]["pattern"], "Plain")
+        self.assertIn(order.invoice_number, response.data["billHtml"])
+
+
+class OrderListingQueryCountTests(OrderTestCase):
+    """A page of orders is served in a constant number of queries, however many items it holds."""
+
+    def test_listing_query_count_is_constant(self):
+        for _ in range(5):
+            self.assertEqual(self.place_order(3).status_code, 201)
+
+        # outlet, orders, prefetched items with their specifications
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("get_orders_by_outlet", args=[self.outlet.id]), {"page_size": 100})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["orders"]), 5)
+        self.assertEqual(len(response.data["orders"][0]["order_items"]), 3)
+
+
+class BatchOrderTests(OrderTestCase):
+    """A malformed order in a batch fails on its own; the rest are placed and reported."""
+
+    def test_malformed_orders_fail_individually(self):
+        valid = {
+            "customer_phone": "9876543210",
+            "order_items": [{"product_id": self.products[0].id, "quantity": 1}],
+        }
+        orders = [valid, {"order_items": ["x"]}, {"order_items": 5}, "not an order", valid]
+
+        response = self.client.post(
+            reverse("place_orders_batch", args=[self.outlet.id]), {"orders": orders, "chunk_size": 2}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        results = response.data["results"]
+        self.assertEqual([result["error"] for result in results], [False, True, True, True, False])
+        self.assertEqual(results[1]["detail"], "Order items must be a list of objects")
+        self.assertEqual(Order.objects.count(), 2)
+
+
+class BootstrapCatalogTests(OrderTestCase):
+    """Specification names first seen in an order retire the cached bootstrap snapshot."""
+
+    def bootstrap(self, **headers):
+        return self.client.get(reverse("counter_bootstrap", args=[self.outlet.id]), **headers)
+
+    def test_new_specification_name_changes_etag(self):
+        response = self.bootstrap()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["brands"], [])
+        etag = response["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.place_order(1).status_code, 201)
+
+        self.assertEqual(self.bootstrap(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        response = self.bootstrap()
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual([brand["name"] for brand in json.loads(response.content)["brands"]], ["Raymond"])
+
+
+class CustomerLookupCacheTests(OrderTestCase):
+    """Cached counter lookups are retired by customer writes committed in another process."""
+
+    def setUp(self):
+        super().setUp()
+        customer_lookup_cache.clear()
+
+    def lookup(self):
+        return self.client.get(reverse("get_customer_by_outlet_and_phone", args=[self.outlet.id]), {"phone_number": "9876543210"})
+
+    def test_import_in_another_process_retires_cached_lookup(self):
+        self.assertEqual(self.lookup().data["customer"]["name"], "Customer")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.lookup().data["customer"]["name"], "Customer")
+
+        # As the run_jobs worker would: bulk write, then invalidate its own in-process cache
+        with mock.patch("panelapi.customers.customer_lookup_cache", CustomerLookupCache()):
+            with self.captureOnCommitCallbacks(execute=True):
+                Customer.objects.filter(phone_number="9876543210").update(name="Imported")
+                invalidate_phone_numbers(["9876543210"])
+
+        self.assertEqual(self.lookup().data["customer"]["name"], "Imported")
@@ -2,9 +2,13 @@ from django.urls import path
 from .views import (
     get_all_categories,
     get_products_by_outlet,
+    search_products_view,
+    sync_catalog,
+    counter_bootstrap,
     get_customer_by_phone_number,
     add_customer,
     place_order,
+    place_orders_batch,
     get_orders_by_outlet,
     add_product,
     brand_list_create,
@@ -28,6 +32,13 @@ urlpatterns = [
 
     # Products
     path('get-products/<int:outlet_id>/', get_products_by_outlet, name='get_products_by_outlet'),
+    path('<int:outlet_id>/products/search/', search_products_view, name='search_products'),
+
+    # Delta sync of products and master data for counters
+    path('<int:outlet_id>/sync/', sync_catalog, name='sync_catalog'),
+
+    # Categories, products and specification lists in one request for counter start-up
+    path('<int:outlet_id>/bootstrap/', counter_bootstrap, name='counter_bootstrap'),
     
     # Method to add a single product to the outlet
     path('<int:outlet_id>/product/add/', add_product, name='add_product_to_outlet'),
@@ -38,6 +49,7 @@ urlpatterns = [
 
     # Orders
     path('<int:outlet_id>/orders/place/', place_order, name='place_order'),
+    path('<int:outlet_id>/orders/batch/', place_orders_batch, name='place_orders_batch'),
     path('<int:outlet_id>/orders/', get_orders_by_outlet, name='get_orders_by_outlet'),
     
     
@@ -1,11 +1,4 @@
-import random
-import string
-import qrcode
-import base64
-
-from io import BytesIO
-
-from datetime import date, datetime
+from datetime import date
 
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
@@ -13,8 +6,6 @@ from django.http import JsonResponse
 from django.db import transaction
 from django.db.models import Q
 from django.shortcuts import render
-from django.utils.timezone import now
-from django.template.loader import render_to_string
 
 
 from drf_yasg.utils import swagger_auto_schema
@@ -26,10 +17,6 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 
-from num2words import num2words 
-
-from decimal import Decimal, ROUND_HALF_UP
-
 from panelapi.models import (
     Outlet,
     Product,
@@ -50,7 +37,6 @@ from panelapi.models import (
     FabricSoftenerType,
     Colour,
     TopUpService,
-    OrderItemSpecification,
 )
 
 from .serializers import (
@@ -72,6 +58,38 @@ from .serializers import (
     TopUpServiceSerializer,
 )
 
+from .specifications import SPECIFICATION_MODELS, resolve_specification_names
+from .orders import InvalidOrder, parse_order_data, fetch_order_products, create_order
+from .sync import InvalidSyncCursor, parse_sync_cursor, build_sync_payload, build_bootstrap_payload
+from .batch import (
+    BATCH_DEFAULT_CHUNK_SIZE,
+    BATCH_MAX_CHUNK_SIZE,
+    BATCH_MAX_ORDERS,
+    place_order_batch,
+)
+
+from .idempotency import (
+    InvalidIdempotencyKey,
+    DuplicateIdempotencyKey,
+    get_idempotency_key,
+    find_idempotency_record,
+    claim_idempotency_key,
+    store_idempotent_response,
+)
+
+from panelapi.invoices import allocate_invoice_number
+from panelapi.bills import render_bill
+from panelapi.catalog import catalog_response
+from panelapi.search import (
+    InvalidSearchRequest,
+    PRODUCT_SEARCH_DEFAULT_LIMIT,
+    PRODUCT_SEARCH_MAX_LIMIT,
+    parse_product_search_limit,
+    search_products,
+)
+from panelapi.customers import customer_generation, customer_lookup_cache, MISS
+from panelapi.pagination import InvalidPageRequest, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate_orders
+
 
 
 
@@ -111,42 +129,51 @@ def get_all_categories(request):
     method='get',
     responses={
         200: ProductSerializer(many=True),
+        304: 'Not Modified: catalog unchanged since the ETag sent in If-None-Match',
         400: 'Bad Request: Outlet not found',
         500: 'Internal Server Error: Unexpected error'
     },
-    operation_description="Fetch products for a specific outlet by outlet_id with associated category names."
+    operation_description=(
+        "Fetch products for a specific outlet by outlet_id with associated category names. "
+        "Responses carry an ETag; send it back in If-None-Match to get a 304 when the catalog has not changed."
+    )
 )
 @api_view(['GET'])
 @permission_classes([AllowAny])  # Allow unrestricted access to get products
 def get_products_by_outlet(request, outlet_id):
     try:
-        # Fetch the outlet by the provided outlet_id
-        outlet = Outlet.objects.get(id=outlet_id)
-        
         # Get category filter from query params (if provided)
         category_name = request.query_params.get('category', None)
 
-        # Get all products associated with the outlet
-        products = Product.objects.filter(outlets=outlet)
-        
-        # If a category filter is provided, filter products by category
-        if category_name:
-            category = Category.objects.filter(name__iexact=category_name).first()  # Case-insensitive match
-            if category:
+        def build():
+            # Fetch the outlet by the provided outlet_id
+            outlet = Outlet.objects.get(id=outlet_id)
+
+            # Get all products associated with the outlet
+            products = Product.objects.filter(outlets=outlet)
+
+            # If a category filter is provided, filter products by category
+            if category_name:
+                category = Category.objects.filter(name__iexact=category_name).first()  # Case-insensitive match
+                if not category:
+                    return None
                 products = products.filter(category=category)
-            else:
-                return Response({
-                    'error': True,
-                    'detail': 'Category not found'
-                }, status=400)
 
-        # Serialize the products along with the category name
-        serializer = ProductSerializer(products, many=True)
-        
-        return Response({
-            'error': False,
-            'products': serializer.data  # Return the serialized product data
-        })
+            # Serialize the products along with the category name
+            serializer = ProductSerializer(products, many=True)
+            return {
+                'error': False,
+                'products': serializer.data  # Return the serialized product data
+            }
+
+        # Served from the outlet's catalog snapshot; If-None-Match gets a 304
+        response = catalog_response(request, 'counter_products', outlet_id, build, (category_name or '').lower())
+        if response is None:
+            return Response({
+                'error': True,
+                'detail': 'Category not found'
+            }, status=400)
+        return response
     
     except Outlet.DoesNotExist:
         return Response({
@@ -163,6 +190,157 @@ def get_products_by_outlet(request, outlet_id):
 
 
 
+@swagger_auto_schema(
+    method='get',
+    manual_parameters=[
+        openapi.Parameter('q', openapi.IN_QUERY, description="Search text: start of a product name, category or HSN/SAC code word (\"sar\" finds Saree).", type=openapi.TYPE_STRING, required=True),
+        openapi.Parameter('limit', openapi.IN_QUERY, description=f"Maximum products returned (default {PRODUCT_SEARCH_DEFAULT_LIMIT}, max {PRODUCT_SEARCH_MAX_LIMIT}).", type=openapi.TYPE_INTEGER),
+    ],
+    responses={
+        200: 'Matching products of the outlet, best first',
+        400: 'Bad Request: Outlet not found, query too short or invalid limit',
+        500: 'Internal Server Error: Unexpected error'
+    },
+    operation_description="Typeahead search of the outlet's products, served from the product search index."
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def search_products_view(request, outlet_id):
+    try:
+        if not Outlet.objects.filter(id=outlet_id).exists():
+            return Response({
+                'error': True,
+                'detail': 'Outlet not found'
+            }, status=400)
+
+        limit = parse_product_search_limit(request.query_params)
+        products = search_products(outlet_id, request.query_params.get('q'), limit)
+
+        return Response({
+            'error': False,
+            'products': products
+        })
+
+    except InvalidSearchRequest as e:
+        return Response({
+            'error': True,
+            'detail': str(e)
+        }, status=400)
+
+    except Exception as e:
+        return Response({
+            'error': True,
+            'detail': str(e)
+        }, status=500)
+
+
+
+
+@swagger_auto_schema(
+    method='get',
+    manual_parameters=[
+        openapi.Parameter(
+            name="since",
+            in_=openapi.IN_QUERY,
+            description="Cursor returned by the previous sync. Omit it to download everything.",
+            type=openapi.TYPE_STRING,
+            required=False,
+        )
+    ],
+    responses={
+        200: openapi.Response(
+            description="Rows changed or deleted since the cursor, per table.",
+            examples={
+                "application/json": {
+                    "error": False,
+                    "cursor": "2025-10-18T10:15:00.000000+00:00",
+                    "full": False,
+                    "changes": {
+                        "products": {"changed": [{"id": 4, "item_name": "Shirt", "rate_per_unit": "50.00"}], "deleted": [7]},
+                        "brands": {"changed": [], "deleted": []}
+                    }
+                }
+            }
+        ),
+        400: 'Bad Request: Invalid since cursor',
+        404: 'Not Found: Outlet not found',
+        500: 'Internal Server Error: Unexpected error'
+    },
+    operation_description=(
+        "Delta sync of the outlet's products, categories and every specification lookup table. "
+        "Returns only rows created, changed or deleted after `since`, plus a new cursor to send next time. "
+        "When `full` is true the counter should replace its local copy instead of merging."
+    )
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def sync_catalog(request, outlet_id):
+    try:
+        outlet = Outlet.objects.get(id=outlet_id)
+        since = parse_sync_cursor(request.query_params.get('since'))
+
+        return Response({
+            'error': False,
+            **build_sync_payload(outlet, since)
+        })
+
+    except Outlet.DoesNotExist:
+        return Response({'error': True, 'detail': 'Outlet not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    except InvalidSyncCursor as e:
+        return Response({'error': True, 'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    except Exception as e:
+        return Response({'error': True, 'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+@swagger_auto_schema(
+    method='get',
+    responses={
+        200: openapi.Response(
+            description="Categories, the outlet's products and every specification list",
+            examples={
+                "application/json": {
+                    "error": False,
+                    "categories": ["Dry Clean"],
+                    "products": [{"id": 1, "item_name": "Saree", "rate_per_unit": "150.00", "hsn_sac_code": "9997"}],
+                    "brands": [{"id": 1, "name": "Zara"}],
+                    "topup_services": []
+                }
+            }
+        ),
+        304: 'Not Modified: nothing changed since the ETag sent in If-None-Match',
+        404: 'Not Found: Outlet not found',
+        500: 'Internal Server Error: Unexpected error'
+    },
+    operation_description=(
+        "Everything a counter loads at start-up in one request: the category names, the outlet's products "
+        "and the brand, pattern, stain type, defect type, material type, starch type, detergent type, "
+        "detergent scent type, wash temperature type, fabric softener type, colour and top-up service lists. "
+        "Served gzip-compressed to clients that accept it. Responses carry an ETag; send it back in "
+        "If-None-Match to get a 304 when nothing has changed."
+    )
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def counter_bootstrap(request, outlet_id):
+    try:
+        def build():
+            return build_bootstrap_payload(Outlet.objects.get(id=outlet_id))
+
+        # One pre-serialized, pre-compressed snapshot per outlet and catalog generation
+        return catalog_response(request, 'counter_bootstrap', outlet_id, build, compress=True)
+
+    except Outlet.DoesNotExist:
+        return Response({'error': True, 'detail': 'Outlet not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    except Exception as e:
+        return Response({'error': True, 'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+
 
 
 
@@ -198,9 +376,6 @@ def get_products_by_outlet(request, outlet_id):
 @permission_classes([AllowAny])
 def get_customer_by_phone_number(request, outlet_id):
     try:
-        # Fetch the outlet by the provided outlet_id
-        outlet = Outlet.objects.get(id=outlet_id)
-        
         # Get phone number from query params
         phone_number = request.query_params.get('phone_number', None)
         
@@ -210,15 +385,24 @@ def get_customer_by_phone_number(request, outlet_id):
                 'detail': 'Phone number is required'
             }, status=400)
         
-        # Get the customer associated with the outlet and the phone number
-        customer = Customer.objects.filter(outlet=outlet, phone_number=phone_number).first()
+        # Served from the in-process lookup cache (unknown numbers are cached too)
+        generation = customer_generation()
+        customer_data = customer_lookup_cache.get(outlet_id, phone_number, generation)
+
+        if customer_data is MISS:
+            # Fetch the outlet by the provided outlet_id
+            outlet = Outlet.objects.get(id=outlet_id)
+
+            # Get the customer associated with the outlet and the phone number
+            customer = Customer.objects.filter(outlet=outlet, phone_number=phone_number).first()
+
+            customer_data = CustomerSerializer(customer).data if customer else None
+            customer_lookup_cache.set(outlet_id, phone_number, customer.id if customer else None, customer_data, generation)
         
-        if customer:
-            # Serialize the customer data
-            serializer = CustomerSerializer(customer)
+        if customer_data:
             return Response({
                 'error': False,
-                'customer': serializer.data  # Return the serialized customer data
+                'customer': customer_data  # Return the serialized customer data
             })
         else:
             return Response({
@@ -558,98 +742,93 @@ def add_customer(request, outlet_id):
 # }
 
 
-def print_bill(order_number):
-    try:
-        # Fetch the order details
-        order = Order.objects.select_related('customer', 'outlet').get(order_number=order_number)
-        order_items = OrderItem.objects.filter(order=order).select_related('product')
-
-        if not order_items.exists():
-            return Response({'error': True, 'detail': 'No items found in the order'}, status=status.HTTP_404_NOT_FOUND)
-
-        # Calculate order totals
-        total_quantity = sum(item.quantity for item in order_items)
-        total_discount = Decimal(order.total_amount) * (Decimal(order.discount_percentage) / Decimal(100)) if order.discount_percentage > 0 else Decimal(0)
-        net_amount = Decimal(order.total_amount) - total_discount  # Net amount already includes GST
-
-        sgst = Decimal(order.total_sgst)
-        cgst = Decimal(order.total_cgst)
-        igst = Decimal(order.total_igst)
-
-        # Calculate round-off and grand amount
-        calculated_total = net_amount  # Since GST is already included, total remains the same
-        rounded_total = calculated_total.quantize(Decimal('1'), rounding="ROUND_HALF_UP")  # Round to the nearest integer
-        round_off = rounded_total - calculated_total  # Difference between rounded total and actual total
-        grand_amount = rounded_total  # Grand total is the rounded value
-
-        # Convert grand total into words
-        total_in_words = num2words(grand_amount, to='currency', currency='INR', lang='en_IN').replace("zero paise", "").replace("-", " ").replace(",", "").title()
-
-        # UPI payment details
-        upi_id = "vyapar.171035825947@hdfcbank"
-        name = "Laundry Talks"
-
-        # Generate UPI URL and QR Code
-        upi_url = f"upi://pay?pa={upi_id}&pn={name}"
-        qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
-        qr.add_data(upi_url)
-        qr.make(fit=True)
-        qr_img = qr.make_image(fill_color="black", back_color="white")
-
-        # Save QR code image to BytesIO buffer
-        qr_buffer = BytesIO()
-        qr_img.save(qr_buffer)
-        qr_buffer.seek(0)
-
-        # Convert QR code image to base64
-        qr_base64 = base64.b64encode(qr_buffer.getvalue()).decode('utf-8')
-
-        # Build context for the template
-        context = {
-            "customer_name": order.customer.name if order.customer else "Walk-in Customer",
-            "billing_date": order.date_of_billing.strftime('%Y-%m-%d'),
-            "customer_address": order.customer.address if order.customer else "Not Provided",
-            "invoice_number": order.invoice_number,
-            "customer_phone": order.customer.phone_number if order.customer else "Not Provided",
-            "reference": order.customer.reference if order.customer and hasattr(order.customer, "reference") else "N/A",
-            "gst_number": order.customer.gst_number if order.customer else "Not Provided",
-            "collection_date": order.date_of_collection.strftime('%Y-%m-%d') if order.date_of_collection else "Not Provided",
-            "items": [
+def print_bill(order, order_items):
+    # Render the template (this also fills the bill cache used for reprints)
+    html, context = render_bill(order, order_items)
+
+    return {
+        "html": html,
+        "context": context
+    }
+
+
+def load_order_items(order):
+    """Read an order's items back with everything the response and bill dereference."""
+    return list(
+        OrderItem.objects.filter(order=order).select_related(
+            "product",
+            "specification",
+            *[f"specification__{key}" for key in SPECIFICATION_MODELS],
+        )
+    )
+
+
+def _specification_name(item, key):
+    related = getattr(item.specification, key) if item.specification else None
+    return related.name if related else ""
+
+
+def build_order_response(order, customer, order_items=None):
+    """
+    Build the place_order response body, including the rendered bill.
+
+    Pass the in-memory items returned by create_order to build it without any
+    queries; otherwise they are loaded in one query (e.g. when replaying).
+    """
+    if order_items is None:
+        order_items = load_order_items(order)
+
+    bill_data = print_bill(order, order_items)
+
+    response_data = {
+        "order_details": {
+            "orderNo/InvoieNo": order.invoice_number,
+            "customer_phone": customer.phone_number if customer else None,
+            "order_items": [
                 {
-                    "description": item.product.item_name,
-                    "hanger": item.hanger,  # Include the hanger value
-                    "hsn_code": item.product.hsn_sac_code if hasattr(item.product, "hsn_sac_code") else " ",
+                    "product_id": item.product_id,
                     "quantity": item.quantity,
-                    "rate": round(item.product.rate_per_unit,2 ),  # Extract GST from rate
-                    "total": round(item.total , 2),  # Extract GST from total
-                } for item in order_items
+                    "specifications": {
+                        "upcharges": "",
+                        "color": "",
+                        "brand": _specification_name(item, "brand"),
+                        "pattern": _specification_name(item, "pattern"),
+                        "material": _specification_name(item, "material_type"),
+                        "defects": _specification_name(item, "defect_type"),
+                        "stains": _specification_name(item, "stain_type"),
+                        "hanger": item.hanger,
+                        "box": item.specification.box if item.specification else False,
+                        "fold": item.specification.fold if item.specification else False,
+                        "starch": _specification_name(item, "starch_type"),
+                        "detergent": _specification_name(item, "detergent_type"),
+                        "detergentScent": _specification_name(item, "detergent_scent_type"),
+                        "washTemperature": _specification_name(item, "wash_temperature_type"),
+                        "fabricSoftener": _specification_name(item, "fabric_softener_type")
+                    }
+                }
+                for item in order_items
             ],
-            "total_quantity": total_quantity,
-            "total_amount": "{:.2f}".format(order.total_amount),
-            "discount_percentage": "{:.2f}".format(order.discount_percentage) if order.discount_percentage > 0 else "0.00",
-            "discount": "{:.2f}".format(total_discount),
-            "net_amount": "{:.2f}".format(net_amount),  # Now it's the base price before GST
-            "sgst": "{:.2f}".format(sgst) if sgst > 0 else None,
-            "cgst": "{:.2f}".format(cgst) if cgst > 0 else None,
-            "igst": "{:.2f}".format(igst) if igst > 0 else None,
-            "round_off": "{:.2f}".format(round_off),
-            "grand_amount": "{:.2f}".format(grand_amount),
-            "total_in_words": total_in_words + " Only.",
-            "qr_code": qr_base64
-        }
-
-        # Render the template
-        html = render_to_string("bill.html", context)
-
-        return {
-            "html": html,
-            "context": context
-        }
-
-    except Order.DoesNotExist:
-        return Response({'error': True, 'detail': 'Order not found'}, status=status.HTTP_404_NOT_FOUND)
-    except Exception as e:
-        return Response({'error': True, 'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            "date_of_collection": order.date_of_collection,
+            "discount_percentage": order.discount_percentage,
+            "mode_of_payment": order.mode_of_payment
+        },
+        "billHtml": bill_data["html"]
+    }
+
+    return response_data
+
+
+def replay_order_response(outlet_id, idempotency_key):
+    """Return the stored response for a previously used Idempotency-Key, or None."""
+    record = find_idempotency_record(outlet_id, idempotency_key)
+    if record is None:
+        return None
+
+    if record.response is None:
+        # The order committed but its response was never stored; rebuild it from the order
+        store_idempotent_response(record, build_order_response(record.order, record.order.customer))
+
+    return record.response
 
 
 
@@ -662,8 +841,18 @@ def print_bill(order_number):
     operation_description=(
         "Places an order for a specific outlet. It creates the order, links it to the customer "
         "by phone, calculates totals & GST, and adds items to the order with optional specifications. "
-        "Specification fields use names (e.g., 'Cotton', 'Blue', 'Express Delivery') instead of IDs."
+        "Specification fields use names (e.g., 'Cotton', 'Blue', 'Express Delivery') instead of IDs. "
+        "Send an Idempotency-Key header to make retries safe: a repeated key returns the original order."
     ),
+    manual_parameters=[
+        openapi.Parameter(
+            name="Idempotency-Key",
+            in_=openapi.IN_HEADER,
+            description="Unique key per order. Retries with the same key replay the original response.",
+            type=openapi.TYPE_STRING,
+            required=False,
+        )
+    ],
     request_body=openapi.Schema(
         type=openapi.TYPE_OBJECT,
         properties={
@@ -824,202 +1013,151 @@ def place_order(request, outlet_id):
         except Outlet.DoesNotExist:
             return Response({'error': True, 'detail': 'Outlet not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        # Extract body data
-        data = request.data
-        customer_phone = data.get('customer_phone')
-        date_of_collection = data.get('date_of_collection')
-        discount_percentage = Decimal(data.get('discount_percentage', 0.0)).quantize(Decimal('0.00'))
-        mode_of_payment = data.get('mode_of_payment', 'CASH')
-        items = data.get('order_items')
+        # Replay the original response if this request is a retry of an already placed order
+        idempotency_key = get_idempotency_key(request)
+        if idempotency_key:
+            replayed = replay_order_response(outlet.id, idempotency_key)
+            if replayed is not None:
+                return Response(replayed, status=status.HTTP_201_CREATED)
 
-        if not items:
-            return Response({'error': True, 'detail': 'Order items are required'}, status=status.HTTP_400_BAD_REQUEST)
+        # Extract and validate body data
+        order_data = parse_order_data(request.data)
+        items = order_data['items']
 
-        # Parse and format date_of_collection
-        if date_of_collection:
-            try:
-                date_of_collection = datetime.fromisoformat(date_of_collection).strftime('%Y-%m-%d')
-            except ValueError:
-                return Response(
-                    {'error': True, 'detail': 'Invalid date format. Use ISO 8601 format.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-        # Validate customer
-        customer = None
-        if customer_phone:
-            customer, created = Customer.objects.get_or_create(
-                phone_number=customer_phone, defaults={'name': 'Unknown'}
+        with transaction.atomic():
+            # Fetch every referenced product in one query before anything is written
+            products = fetch_order_products(items)
+
+            # Resolve every specification name across all items in one query per lookup table
+            resolved_specifications = resolve_specification_names(items)
+
+            # Reserve the next invoice number (outlet_idLTmmyysequential_number) under a row lock
+            invoice_number = allocate_invoice_number(outlet.id)
+
+            order, customer, order_items = create_order(
+                outlet, order_data, products, resolved_specifications, invoice_number
             )
 
-        # Generate order number
-        order_number = ''.join(random.choices(string.ascii_uppercase + string.digits, k=12))
-
-        # Generate invoice number in the format: outlet_idLTmmyysequential_number
-        current_date = now()
-        month_year = current_date.strftime('%m%y')
-        last_order = Order.objects.filter(
-            outlet=outlet,
-            invoice_number__startswith=f"{outlet_id}LT{month_year}"
-        ).order_by('-id').first()
-
-        if last_order:
-            sequential_part = last_order.invoice_number[len(f"{outlet_id}LT{month_year}"):]
-            if sequential_part.isdigit():
-                last_invoice_number = int(sequential_part)
-            else:
-                return Response(
-                    {'error': True, 'detail': 'Invalid format for last invoice number'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-            next_invoice_number = last_invoice_number + 1
-        else:
-            next_invoice_number = 1
+            # Bind the Idempotency-Key to this order; a concurrent retry rolls back here
+            idempotency_record = claim_idempotency_key(outlet, idempotency_key, order) if idempotency_key else None
 
-        invoice_number = f"{outlet_id}LT{month_year}{next_invoice_number}"
+        # Built from the objects written above: no reads after the commit
+        response_data = build_order_response(order, customer, order_items)
 
-        total_amount = Decimal('0.00')
+        if idempotency_record:
+            store_idempotent_response(idempotency_record, response_data)
 
-        with transaction.atomic():
-            order = Order.objects.create(
-                order_number=order_number,
-                outlet=outlet,
-                customer=customer,
-                date_of_collection=date_of_collection,
-                total_amount=total_amount,  # will update later
-                discount_percentage=discount_percentage,
-                mode_of_payment=mode_of_payment,
-                invoice_number=invoice_number,
+        return Response(response_data, status=status.HTTP_201_CREATED)
+
+    except InvalidOrder as e:
+        return Response({'error': True, 'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    except InvalidIdempotencyKey as e:
+        return Response({'error': True, 'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    except DuplicateIdempotencyKey:
+        # A concurrent retry with the same key won the race; return its order instead of a duplicate
+        replayed = replay_order_response(outlet.id, idempotency_key)
+        if replayed is None:
+            return Response(
+                {'error': True, 'detail': 'A request with this Idempotency-Key is already being processed'},
+                status=status.HTTP_409_CONFLICT
             )
+        return Response(replayed, status=status.HTTP_201_CREATED)
 
-            # Add items to order and calculate total
-            for item in items:
-                product_id = item.get('product_id')
-                quantity = Decimal(item.get('quantity', 1)).quantize(Decimal('0.00'))
-                hanger = item.get('hanger', False)
-
-                try:
-                    product = Product.objects.get(id=product_id)
-                except Product.DoesNotExist:
-                    return Response(
-                        {'error': True, 'detail': f'Product with ID {product_id} not found'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
-                # --- Specification from NAMES ---
-                spec_data = item.get('specification')
-                specification = None
-
-                if isinstance(spec_data, dict):
-
-                    def get_obj_id(model, key):
-                        value = spec_data.get(key)
-                        if value:
-                            obj, _ = model.objects.get_or_create(name=value)
-                            return obj.id
-                        return None
-
-                    specification = OrderItemSpecification.objects.create(
-                        brand_id=get_obj_id(Brand, "brand"),
-                        pattern_id=get_obj_id(Pattern, "pattern"),
-                        stain_type_id=get_obj_id(StainType, "stain_type"),
-                        defect_type_id=get_obj_id(DefectType, "defect_type"),
-                        material_type_id=get_obj_id(MaterialType, "material_type"),
-                        starch_type_id=get_obj_id(StarchType, "starch_type"),
-                        detergent_type_id=get_obj_id(DetergentType, "detergent_type"),
-                        detergent_scent_type_id=get_obj_id(DetergentScentType, "detergent_scent_type"),
-                        wash_temperature_type_id=get_obj_id(WashTemperatureType, "wash_temperature_type"),
-                        fabric_softener_type_id=get_obj_id(FabricSoftenerType, "fabric_softener_type"),
-                        colour_id=get_obj_id(Colour, "colour"),
-                        top_up_service_id=get_obj_id(TopUpService, "top_up_service"),
-                        box=spec_data.get('box', False),
-                        fold=spec_data.get('fold', False),
-                    )
-
-                total = (Decimal(product.rate_per_unit) * quantity).quantize(Decimal('0.00'))
-
-                OrderItem.objects.create(
-                    order=order,
-                    product=product,
-                    quantity=quantity,
-                    total=total,
-                    hanger=hanger,
-                    specification=specification,
-                )
-
-                total_amount += total
-
-            # Calculate total after discount
-            total_after_discount = total_amount - (total_amount * (discount_percentage / Decimal('100')))
-
-            # Determine GST type
-            customer_state = customer.state.lower() if customer and customer.state else ""
-            is_uttar_pradesh = (customer_state == "uttar pradesh")
-
-            igst = Decimal('0.00')
-
-            # Extract GST from the already included price
-            if is_uttar_pradesh:
-                base_price = total_after_discount / Decimal('1.18')
-                cgst = base_price * (Decimal('9') / Decimal('100'))
-                sgst = base_price * (Decimal('9') / Decimal('100'))
-            else:
-                base_price = total_after_discount / Decimal('1.18')
-                cgst = Decimal('0.00')
-                sgst = Decimal('0.00')
-                igst = base_price * (Decimal('18') / Decimal('100'))
-
-            total_gst = (cgst + sgst + igst).quantize(Decimal('0.00'))
-            total_after_gst = total_after_discount
-
-            order.total_amount = total_amount.quantize(Decimal('0.00'))
-            order.total_after_discount = total_after_discount.quantize(Decimal('0.00'))
-            order.total_gst = total_gst
-            order.total_cgst = cgst.quantize(Decimal('0.00'))
-            order.total_sgst = sgst.quantize(Decimal('0.00'))
-            order.total_igst = igst.quantize(Decimal('0.00'))
-            order.total_after_gst = total_after_gst
-            order.save()
-
-        # Assuming print_bill returns a DRF Response
-        bill_data = print_bill(order.order_number)
-
-        response_data = {
-            "order_details": {
-                "orderNo/InvoieNo": order.invoice_number,
-                "customer_phone": customer.phone_number if customer else None,
-                "order_items": [
-                    {
-                        "product_id": item.product.id,
-                        "quantity": item.quantity,
-                        "specifications": {
-                            "upcharges": "",
-                            "color": "",
-                            "brand": item.specification.brand.name if item.specification and item.specification.brand else "",
-                            "pattern": item.specification.pattern.name if item.specification and item.specification.pattern else "",
-                            "material": item.specification.material_type.name if item.specification and item.specification.material_type else "",
-                            "defects": item.specification.defect_type.name if item.specification and item.specification.defect_type else "",
-                            "stains": item.specification.stain_type.name if item.specification and item.specification.stain_type else "",
-                            "hanger": item.hanger,
-                            "box": item.specification.box if item.specification else False,
-                            "fold": item.specification.fold if item.specification else False,
-                            "starch": item.specification.starch_type.name if item.specification and item.specification.starch_type else "",
-                            "detergent": item.specification.detergent_type.name if item.specification and item.specification.detergent_type else "",
-                            "detergentScent": item.specification.detergent_scent_type.name if item.specification and item.specification.detergent_scent_type else "",
-                            "washTemperature": item.specification.wash_temperature_type.name if item.specification and item.specification.wash_temperature_type else "",
-                            "fabricSoftener": item.specification.fabric_softener_type.name if item.specification and item.specification.fabric_softener_type else ""
-                        }
-                    }
-                    for item in OrderItem.objects.filter(order=order).select_related("product", "specification")
-                ],
-                "date_of_collection": order.date_of_collection,
-                "discount_percentage": order.discount_percentage,
-                "mode_of_payment": order.mode_of_payment
-            },
-            "billHtml": bill_data["html"]
-        }
+    except Exception as e:
+        return Response({'error': True, 'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        return Response(response_data, status=status.HTTP_201_CREATED)
+
+@swagger_auto_schema(
+    method='post',
+    operation_summary="Place a Batch of Orders",
+    operation_description=(
+        "Places many orders for an outlet in one call, e.g. when a counter drains the orders it queued "
+        "while offline. Each entry of `orders` has the same shape as the Place an Order body, plus an "
+        "optional `idempotency_key`. Orders are written `chunk_size` at a time, one transaction per chunk, "
+        "with invoice numbers reserved as a block. Bills are not rendered; fetch them from `bill_url`."
+    ),
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            "orders": openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                description=f"Orders to place (at most {BATCH_MAX_ORDERS}), in the order they were taken.",
+                items=openapi.Schema(type=openapi.TYPE_OBJECT),
+            ),
+            "chunk_size": openapi.Schema(
+                type=openapi.TYPE_INTEGER,
+                description=f"Orders written per transaction (1-{BATCH_MAX_CHUNK_SIZE}).",
+                default=BATCH_DEFAULT_CHUNK_SIZE,
+            ),
+        },
+        required=["orders"],
+    ),
+    responses={
+        200: openapi.Response(
+            description="Per-order results, in request order.",
+            examples={
+                "application/json": {
+                    "error": False,
+                    "placed": 1,
+                    "failed": 1,
+                    "results": [
+                        {
+                            "index": 0,
+                            "error": False,
+                            "replayed": False,
+                            "order_number": "ABC123456789",
+                            "invoice_number": "1LT102537",
+                            "bill_url": "/v1/panel/api/generate-bill/ABC123456789/"
+                        },
+                        {"index": 1, "error": True, "detail": "Product with ID 99 not found"}
+                    ]
+                }
+            }
+        ),
+        400: openapi.Response(description="Invalid batch."),
+        404: openapi.Response(description="Outlet not found."),
+    },
+)
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def place_orders_batch(request, outlet_id):
+    try:
+        # Validate outlet
+        try:
+            outlet = Outlet.objects.get(id=outlet_id)
+        except Outlet.DoesNotExist:
+            return Response({'error': True, 'detail': 'Outlet not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        orders = request.data.get('orders')
+        if not isinstance(orders, list) or not orders:
+            return Response({'error': True, 'detail': 'orders must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(orders) > BATCH_MAX_ORDERS:
+            return Response(
+                {'error': True, 'detail': f'At most {BATCH_MAX_ORDERS} orders can be placed per batch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            chunk_size = int(request.data.get('chunk_size', BATCH_DEFAULT_CHUNK_SIZE))
+        except (TypeError, ValueError):
+            chunk_size = 0
+        if not 1 <= chunk_size <= BATCH_MAX_CHUNK_SIZE:
+            return Response(
+                {'error': True, 'detail': f'chunk_size must be between 1 and {BATCH_MAX_CHUNK_SIZE}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = place_order_batch(outlet, orders, chunk_size)
+        failed = sum(1 for result in results if result['error'])
+
+        return Response({
+            'error': False,
+            'placed': len(results) - failed,
+            'failed': failed,
+            'results': results,
+        }, status=status.HTTP_200_OK)
 
     except Exception as e:
         return Response({'error': True, 'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1478,7 +1616,7 @@ def place_order(request, outlet_id):
 @swagger_auto_schema(
     method='get',
     operation_summary="Retrieve Orders by Outlet",
-    operation_description="Retrieve a list of all orders for a specific outlet with optional filters for date and customer phone number.",
+    operation_description="Retrieve the orders of a specific outlet, newest first, with optional filters for date and customer phone number. Results are paginated; pass the `next` value back as `cursor` to get the following page.",
     manual_parameters=[
         openapi.Parameter(
             'start_date',
@@ -1500,6 +1638,18 @@ def place_order(request, outlet_id):
             description="Filter orders by the customer's phone number.",
             type=openapi.TYPE_STRING,
         ),
+        openapi.Parameter(
+            'page_size',
+            openapi.IN_QUERY,
+            description=f"Orders per page (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE}).",
+            type=openapi.TYPE_INTEGER,
+        ),
+        openapi.Parameter(
+            'cursor',
+            openapi.IN_QUERY,
+            description="The `next` value of the previous page. Omit it for the newest orders.",
+            type=openapi.TYPE_STRING,
+        ),
     ],
     responses={
         200: openapi.Response(
@@ -1520,7 +1670,9 @@ def place_order(request, outlet_id):
                             "total_igst": "0.00",
                             "mode_of_payment": "CASH"
                         }
-                    ]
+                    ],
+                    "page_size": 100,
+                    "next": "WyIyMDI0LTEyLTAxIiwgNDJd"
                 }
             }
         ),
@@ -1572,15 +1724,25 @@ def get_orders_by_outlet(request, outlet_id):
                     "detail": "No orders found for the given customer phone number."
                 }, status=status.HTTP_404_NOT_FOUND)
         
-        orders = Order.objects.filter(filters).order_by('-date_of_billing')
+        # One page of orders, newest first; `next` continues from the last one
+        orders, page_size, next_cursor = paginate_orders(
+            OrderSerializer.setup_eager_loading(Order.objects.filter(filters)), request.query_params
+        )
 
         serializer = OrderSerializer(orders, many=True)
 
         return Response({
             "error": False,
-            "orders": serializer.data
+            "orders": serializer.data,
+            "page_size": page_size,
+            "next": next_cursor
         }, status=status.HTTP_200_OK)
 
+    except InvalidPageRequest as e:
+        return Response({
+            "error": True,
+            "detail": str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Outlet.DoesNotExist:
         return Response({
             "error": True,
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 from pathlib import Path
 import os
 
+from corsheaders.defaults import default_headers
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -142,6 +144,17 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Cache Configuration
+# File based so rendered bills and invalidations are shared by every worker process
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    }
+}
+
+
 # Media Files Configuration
 
 MEDIA_URL = '/media/'
@@ -164,6 +177,11 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOWED_ORIGINS = ['https://*','http://*']
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ORIGIN_WHITELIST = ['https://*','http://*']
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+
+
+# Idempotent order placement
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24  # Seconds a replayed Idempotency-Key returns the original order
 
 
 # SMTP Settings
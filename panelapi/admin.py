@@ -20,7 +20,11 @@ from .models import (
     Colour,
     TopUpService,
     OrderItemSpecification,
-
+    InvoiceSequence,
+    IdempotencyKey,
+    SyncTombstone,
+    DailyOutletSales,
+    Job,
 )
 
 
@@ -189,4 +193,49 @@ class OrderItemSpecificationAdmin(admin.ModelAdmin):
         "fabric_softener_type",
         "colour",
         "top_up_service",
-    )
\ No newline at end of file
+    )
+
+    # Rows are created by orders and shared by every item with the same specs: editing or
+    # deleting one would change all of them (and leave workers holding a dead id), and an
+    # added row would collide with the existing one's signature
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(InvoiceSequence)
+class InvoiceSequenceAdmin(admin.ModelAdmin):
+    list_display = ('outlet', 'period', 'last_number')
+    list_filter = ('outlet', 'period')
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'outlet', 'order', 'created_at', 'expires_at')
+    search_fields = ('key', 'order__order_number')
+    list_filter = ('outlet',)
+
+
+@admin.register(SyncTombstone)
+class SyncTombstoneAdmin(admin.ModelAdmin):
+    list_display = ('model', 'object_id', 'outlet', 'deleted_at')
+    list_filter = ('model', 'outlet')
+
+
+@admin.register(DailyOutletSales)
+class DailyOutletSalesAdmin(admin.ModelAdmin):
+    list_display = ('outlet', 'date', 'mode_of_payment', 'order_count', 'item_count', 'gross', 'discount')
+    list_filter = ('outlet', 'mode_of_payment')
+    date_hierarchy = 'date'
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'processed', 'attempts', 'worker', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('checkpoint', 'result', 'heartbeat_at', 'started_at', 'finished_at')
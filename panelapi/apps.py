@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PanelapiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'panelapi'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (connects the model signal handlers)
+        from . import job_handlers  # noqa: F401  (registers the background job handlers)
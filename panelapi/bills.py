@@ -0,0 +1,117 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+
+from num2words import num2words
+
+from .models import Order
+from .pricing import order_price
+from .qr import upi_qr_code
+
+
+# Rendered bills are kept for a day; reprints mostly happen at pickup time
+BILL_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def bill_context(order, order_items):
+    """Template context for an order's bill."""
+    # Discount, GST split and round-off all come from the shared pricing engine
+    total_quantity = sum(item.quantity for item in order_items)
+    price = order_price(order)
+    sgst = price.total_sgst
+    cgst = price.total_cgst
+    igst = price.total_igst
+    grand_amount = price.grand_total
+
+    # Convert grand total to words
+    total_in_words = num2words(grand_amount, to='currency', currency='INR', lang='en_IN').replace(", zero paise", "").replace("-", " ").replace(",", "").title()
+
+    return {
+        "customer_name": order.customer.name if order.customer else "Walk-in Customer",
+        "billing_date": order.date_of_billing.strftime('%Y-%m-%d'),
+        "customer_address": order.customer.address if order.customer else "Not Provided",
+        "invoice_number": order.invoice_number,
+        "customer_phone": order.customer.phone_number if order.customer else "Not Provided",
+        "reference": order.customer.reference if order.customer else "N/A",
+        "gst_number": order.customer.gst_number if order.customer else "Not Provided",
+        "collection_date": order.date_of_collection.strftime('%Y-%m-%d') if order.date_of_collection else "Not Provided",
+        "items": [
+            {
+                "description": item.product.item_name,
+                "hanger": item.hanger,  # Include the hanger value
+                "hsn_code": item.product.hsn_sac_code if hasattr(item.product, "hsn_sac_code") else " ",
+                "quantity": item.quantity,
+                "rate": round(item.product.rate_per_unit, 2),
+                "total": round(item.total, 2),
+            } for item in order_items
+        ],
+        "total_quantity": total_quantity,
+        "total_amount": "{:.2f}".format(order.total_amount),
+        "discount_percentage": "{:.2f}".format(order.discount_percentage) if order.discount_percentage > 0 else "0.00",
+        "discount": "{:.2f}".format(price.discount),
+        "net_amount": "{:.2f}".format(price.total_after_discount),
+        "sgst": "{:.2f}".format(sgst) if sgst > 0 else None,
+        "cgst": "{:.2f}".format(cgst) if cgst > 0 else None,
+        "igst": "{:.2f}".format(igst) if igst > 0 else None,
+        "round_off": "{:.2f}".format(price.round_off),
+        "grand_amount": "{:.2f}".format(grand_amount),
+        "total_in_words": total_in_words + " Only.",
+        # UPI payment QR code (generated once and served from the shared QR cache)
+        "qr_code": upi_qr_code(),
+    }
+
+
+def render_bill(order, order_items):
+    """Render bill.html for an order and cache the result. Returns (html, context)."""
+    context = bill_context(order, order_items)
+    html = render_to_string("bill.html", context)
+    cache_bill(order, html)
+    return html, context
+
+
+# ==============================
+# Rendered bill cache
+# ==============================
+
+def _bill_cache_key(order_number):
+    return f"bill:{order_number}"
+
+
+def get_cached_bill(order_number):
+    """Rendered bill HTML for an order, or None if it is not cached (or was invalidated)."""
+    entry = cache.get(_bill_cache_key(order_number))
+    return entry["html"] if entry else None
+
+
+def cache_bill(order, html):
+    """Store a rendered bill unless a newer version of the order has already invalidated it."""
+    key = _bill_cache_key(order.order_number)
+    entry = cache.get(key)
+    if entry and entry["version"] > order.version:
+        return
+    cache.set(key, {"version": order.version, "html": html}, BILL_CACHE_TIMEOUT)
+
+
+def invalidate_bill(order):
+    """
+    Drop the cached bill once the current transaction commits. A tombstone
+    carrying the order version stops an in-flight render of the old version
+    from putting a stale bill back.
+    """
+    key = _bill_cache_key(order.order_number)
+    version = order.version
+
+    transaction.on_commit(
+        lambda: cache.set(key, {"version": version, "html": None}, BILL_CACHE_TIMEOUT)
+    )
+
+
+def bump_bill_version(order):
+    """
+    Give an order a new bill version and drop its cached bill. The bump is an
+    F() update, so concurrent edits of the same order each get their own.
+    """
+    if Order.objects.filter(pk=order.pk).update(version=F("version") + 1):
+        order.refresh_from_db(fields=["order_number", "version"])
+        invalidate_bill(order)
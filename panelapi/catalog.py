@@ -0,0 +1,111 @@
+import gzip
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+
+from rest_framework.renderers import JSONRenderer
+
+
+# Snapshots of superseded generations are never read again and simply age out
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Compression level of pre-compressed snapshots; they are built once per generation
+CATALOG_GZIP_LEVEL = 6
+
+_GENERATION_KEY = "catalog:generation"
+
+
+# ==============================
+# Catalog generation
+# ==============================
+
+def catalog_generation():
+    """Token that changes whenever any catalog or specification row, or product-outlet link, changes."""
+    generation = cache.get(_GENERATION_KEY)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        # Another worker may have set it meanwhile; use whichever got there first
+        if not cache.add(_GENERATION_KEY, generation, None):
+            generation = cache.get(_GENERATION_KEY, generation)
+    return generation
+
+
+def invalidate_catalog():
+    """
+    Retire every outlet's catalog snapshot once the current transaction
+    commits. A product can be listed at many outlets and catalogs change a
+    few times a month, so one global generation is simpler than tracking
+    which outlets a change touches.
+    """
+    transaction.on_commit(lambda: cache.set(_GENERATION_KEY, uuid.uuid4().hex, None))
+
+
+# ==============================
+# Snapshots
+# ==============================
+
+def _opaque_tag(etag):
+    # If-None-Match uses the weak comparison, so W/"x" and "x" match each other
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def _etag_matches(request, etag):
+    if_none_match = request.headers.get("If-None-Match", "")
+    return if_none_match.strip() == "*" or _opaque_tag(etag) in [
+        _opaque_tag(value.strip()) for value in if_none_match.split(",")
+    ]
+
+
+def _accepts_gzip(request):
+    return "gzip" in request.headers.get("Accept-Encoding", "").lower()
+
+
+def catalog_response(request, name, outlet_id, build, variant="", compress=False):
+    """
+    Serve a catalog listing from its cached snapshot: the response body as
+    JSON bytes plus a strong ETag (hash of those bytes). A request whose
+    If-None-Match carries the current ETag gets a 304 without touching the
+    database.
+
+    On a miss `build()` is called for the payload; it may raise (e.g. the
+    outlet does not exist) or return None when there is nothing to cache,
+    in which case None is returned and the caller answers as before.
+
+    With `compress` the snapshot also keeps the body gzipped, and clients
+    sending Accept-Encoding: gzip get those bytes as they are, so a large
+    payload is compressed once per generation rather than once per request.
+    The gzipped variant carries the weak form of the ETag.
+    """
+    key = f"catalog:{name}:{outlet_id}:{variant}:{catalog_generation()}"
+    snapshot = cache.get(key)
+
+    if snapshot is None:
+        payload = build()
+        if payload is None:
+            return None
+        body = JSONRenderer().render(payload)
+        snapshot = {"etag": f'"{hashlib.sha1(body).hexdigest()}"', "body": body}
+        if compress:
+            # mtime=0 keeps the bytes identical across rebuilds of the same body
+            snapshot["gzip"] = gzip.compress(body, compresslevel=CATALOG_GZIP_LEVEL, mtime=0)
+        cache.set(key, snapshot, CATALOG_CACHE_TIMEOUT)
+
+    gzipped = "gzip" in snapshot and _accepts_gzip(request)
+    etag = f"W/{snapshot['etag']}" if gzipped else snapshot["etag"]
+
+    if _etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    elif gzipped:
+        response = HttpResponse(snapshot["gzip"], content_type="application/json")
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(snapshot["body"], content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"  # clients may keep it but must revalidate
+    if "gzip" in snapshot:
+        patch_vary_headers(response, ["Accept-Encoding"])
+    return response
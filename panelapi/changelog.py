@@ -0,0 +1,63 @@
+from django.utils.timezone import now
+
+from .models import (
+    Category,
+    Product,
+    Brand,
+    Pattern,
+    StainType,
+    DefectType,
+    MaterialType,
+    StarchType,
+    DetergentType,
+    DetergentScentType,
+    WashTemperatureType,
+    FabricSoftenerType,
+    Colour,
+    TopUpService,
+    SyncTombstone,
+)
+
+
+# Catalog and master-data tables counters keep a local copy of, keyed by the
+# name used in the sync payload and in SyncTombstone.model
+SYNC_MODELS = {
+    "categories": Category,
+    "products": Product,
+    "brands": Brand,
+    "patterns": Pattern,
+    "stain_types": StainType,
+    "defect_types": DefectType,
+    "material_types": MaterialType,
+    "starch_types": StarchType,
+    "detergent_types": DetergentType,
+    "detergent_scent_types": DetergentScentType,
+    "wash_temperature_types": WashTemperatureType,
+    "fabric_softener_types": FabricSoftenerType,
+    "colours": Colour,
+    "topup_services": TopUpService,
+}
+
+# Tombstones older than this are purged; a counter whose cursor is older gets a full snapshot
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+
+def sync_key(model):
+    """Sync key of a tracked model, or None if counters do not sync it."""
+    for key, tracked in SYNC_MODELS.items():
+        if tracked is model:
+            return key
+    return None
+
+
+def record_deletions(key, object_ids, outlet_id=None):
+    """Write tombstones so counters drop these rows (or just drop them from one outlet)."""
+    SyncTombstone.objects.bulk_create([
+        SyncTombstone(model=key, object_id=object_id, outlet_id=outlet_id)
+        for object_id in object_ids
+    ])
+
+
+def touch_products(product_ids):
+    """Bump updated_at on products whose outlet membership changed (queryset updates skip auto_now)."""
+    Product.objects.filter(pk__in=product_ids).update(updated_at=now())
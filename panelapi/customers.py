@@ -0,0 +1,160 @@
+import threading
+import time
+import uuid
+
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+# Lookups kept per worker process; least-recently-used entries are evicted first
+CUSTOMER_CACHE_SIZE = 10000
+
+# Seconds a found customer is served from memory. Customer writes in any
+# process retire every worker's entries through the shared generation below;
+# the TTL only bounds how long a little-used entry is kept.
+CUSTOMER_CACHE_TTL = 300
+
+# Unknown numbers are usually added a moment later, possibly by another worker
+CUSTOMER_NEGATIVE_CACHE_TTL = 30
+
+# Returned by CustomerLookupCache.get when the lookup is not cached
+MISS = object()
+
+_GENERATION_KEY = "customers:generation"
+
+
+# ==============================
+# Customer generation
+# ==============================
+
+def customer_generation():
+    """Token in the shared Django cache that changes whenever any customer is written."""
+    generation = cache.get(_GENERATION_KEY)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        # Another worker may have set it meanwhile; use whichever got there first
+        if not cache.add(_GENERATION_KEY, generation, None):
+            generation = cache.get(_GENERATION_KEY, generation)
+    return generation
+
+
+def _bump_customer_generation():
+    cache.set(_GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+# ==============================
+# Lookup cache
+# ==============================
+
+class CustomerLookupCache:
+    """
+    Thread-safe TTL + LRU cache of counter customer lookups keyed by
+    (outlet_id, phone_number). Values are the serialized customer, or None
+    for a number with no customer at that outlet (negative result).
+
+    Each entry remembers the customer generation it was read under and is
+    only served while that generation is current, so a write committed by
+    another process (a web worker or the run_jobs import) is seen at once.
+    Read the generation before querying the customer, so a write committing
+    in between leaves the entry already stale.
+    """
+
+    def __init__(self, max_size=CUSTOMER_CACHE_SIZE, ttl=CUSTOMER_CACHE_TTL, negative_ttl=CUSTOMER_NEGATIVE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, generation, customer_id, data)
+        self._keys_by_phone = {}       # phone_number -> {keys}
+        self._key_by_customer = {}     # customer_id -> key of its positive entry
+
+    def get(self, outlet_id, phone_number, generation=None):
+        key = (outlet_id, phone_number)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISS
+            if entry[0] <= time.monotonic() or entry[1] != generation:
+                self._discard(key)
+                return MISS
+            self._entries.move_to_end(key)
+            return entry[3]
+
+    def set(self, outlet_id, phone_number, customer_id=None, data=None, generation=None):
+        """Cache a found customer (id and serialized data) or, with no data, a negative result."""
+        key = (outlet_id, phone_number)
+        ttl = self.ttl if data is not None else self.negative_ttl
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + ttl, generation, customer_id, data)
+            self._keys_by_phone.setdefault(phone_number, set()).add(key)
+            if customer_id is not None:
+                self._key_by_customer[customer_id] = key
+            while len(self._entries) > self.max_size:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, customer_id=None, phone_number=None):
+        """
+        Drop everything a customer write can make stale: the customer's own
+        entry (cached under its previous outlet / number) and every entry,
+        negative ones included, for its current number.
+        """
+        with self._lock:
+            key = self._key_by_customer.get(customer_id)
+            if key:
+                self._discard(key)
+            for key in list(self._keys_by_phone.get(phone_number, ())):
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_phone.clear()
+            self._key_by_customer.clear()
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        phone_keys = self._keys_by_phone.get(key[1])
+        if phone_keys:
+            phone_keys.discard(key)
+            if not phone_keys:
+                del self._keys_by_phone[key[1]]
+        if entry[2] is not None and self._key_by_customer.get(entry[2]) == key:
+            del self._key_by_customer[entry[2]]
+
+
+customer_lookup_cache = CustomerLookupCache()
+
+
+def invalidate_customer(customer):
+    """
+    Drop a customer's cached lookups now and again once the current
+    transaction commits, so a lookup racing the write cannot cache the old
+    row, and move the generation on so other processes drop theirs too.
+    """
+    customer_id, phone_number = customer.pk, customer.phone_number
+
+    def invalidate():
+        customer_lookup_cache.invalidate(customer_id, phone_number)
+        _bump_customer_generation()
+
+    customer_lookup_cache.invalidate(customer_id, phone_number)
+    transaction.on_commit(invalidate)
+
+
+def invalidate_phone_numbers(phone_numbers):
+    """Drop cached lookups for many numbers, for writes that bypass save() (bulk import)."""
+    phone_numbers = list(phone_numbers)
+
+    def invalidate():
+        for phone_number in phone_numbers:
+            customer_lookup_cache.invalidate(phone_number=phone_number)
+
+    invalidate()
+    transaction.on_commit(invalidate)
+    # Retires the entries cached by every other process, e.g. web workers when run_jobs imports
+    transaction.on_commit(_bump_customer_generation)
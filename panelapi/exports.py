@@ -0,0 +1,109 @@
+import csv
+import tempfile
+
+from datetime import date
+
+from django.http import StreamingHttpResponse, FileResponse
+
+from openpyxl import Workbook
+
+from .models import OrderItem
+
+
+# Rows fetched from the database per round trip while streaming an export
+EXPORT_CHUNK_SIZE = 2000
+
+# One row per order line; the order columns repeat on every line of the order
+EXPORT_COLUMNS = [
+    ("Order Number", "order__order_number"),
+    ("Invoice Number", "order__invoice_number"),
+    ("Date of Billing", "order__date_of_billing"),
+    ("Date of Collection", "order__date_of_collection"),
+    ("Customer Name", "order__customer__name"),
+    ("Customer Phone", "order__customer__phone_number"),
+    ("Customer State", "order__customer__state"),
+    ("Customer GSTIN", "order__customer__gst_number"),
+    ("Mode of Payment", "order__mode_of_payment"),
+    ("Discount %", "order__discount_percentage"),
+    ("Order Total", "order__total_amount"),
+    ("Total After Discount", "order__total_after_discount"),
+    ("CGST", "order__total_cgst"),
+    ("SGST", "order__total_sgst"),
+    ("IGST", "order__total_igst"),
+    ("Total GST", "order__total_gst"),
+    ("Item", "product__item_name"),
+    ("HSN/SAC", "product__hsn_sac_code"),
+    ("Rate", "product__rate_per_unit"),
+    ("Quantity", "quantity"),
+    ("Line Total", "total"),
+    ("Hanger", "hanger"),
+]
+
+
+class InvalidExportRequest(Exception):
+    """Raised when the export filters are malformed."""
+
+
+def parse_export_date(value, name):
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise InvalidExportRequest(f'Invalid {name}. Use YYYY-MM-DD.')
+
+
+def export_rows(outlet_id, start_date=None, end_date=None):
+    """
+    Header plus one tuple per order line of an outlet, oldest order first.
+
+    Reads plain value tuples with a server-side iterator, so only one chunk
+    is ever held in memory whatever the date range.
+    """
+    items = OrderItem.objects.filter(order__outlet_id=outlet_id)
+    if start_date:
+        items = items.filter(order__date_of_billing__gte=start_date)
+    if end_date:
+        items = items.filter(order__date_of_billing__lte=end_date)
+
+    yield [header for header, _ in EXPORT_COLUMNS]
+    yield from items.order_by("order__date_of_billing", "order_id", "id").values_list(
+        *[field for _, field in EXPORT_COLUMNS]
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_export_response(rows, filename):
+    writer = csv.writer(_Echo())
+    response = StreamingHttpResponse((writer.writerow(row) for row in rows), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def xlsx_export_response(rows, filename):
+    """
+    Write the rows with openpyxl's write-only mode, which flushes each row to
+    disk instead of keeping the sheet in memory, then stream the file back.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Orders")
+    for row in rows:
+        sheet.append(row)
+
+    # The temporary file is removed when the response closes it
+    export_file = tempfile.TemporaryFile(suffix=".xlsx")
+    workbook.save(export_file)
+    export_file.seek(0)
+
+    return FileResponse(
+        export_file,
+        as_attachment=True,
+        filename=filename,
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
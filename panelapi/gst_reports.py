@@ -0,0 +1,161 @@
+import calendar
+import tempfile
+
+from collections import defaultdict
+from datetime import date
+
+from django.http import FileResponse
+
+from openpyxl import Workbook
+
+from .models import OrderItem
+from .pricing import GST_RATE_PERCENT, to_paise, from_paise, price_paise, is_intra_state
+
+
+# Order lines read from the database per round trip
+GST_REPORT_CHUNK_SIZE = 5000
+
+# Positions in the OrderPrice tuple returned by price_paise
+_NET, _TAXABLE, _CGST, _SGST, _IGST = 2, 3, 4, 5, 6
+
+# Report columns held in paise while aggregating
+_AMOUNT_KEYS = {"invoice_value", "total_value", "taxable_value", "cgst", "sgst", "igst"}
+
+_LINE_FIELDS = (
+    "order_id",
+    "order__invoice_number",
+    "order__date_of_billing",
+    "order__discount_percentage",
+    "order__total_after_discount",
+    "order__total_cgst",
+    "order__total_sgst",
+    "order__total_igst",
+    "order__customer__name",
+    "order__customer__gst_number",
+    "order__customer__state",
+    "product__hsn_sac_code",
+    "quantity",
+    "total",
+)
+
+
+class InvalidReportPeriod(Exception):
+    """Raised when the report month is not in YYYY-MM format."""
+
+
+def parse_report_month(value):
+    """First and last day of a YYYY-MM month."""
+    try:
+        year, month = (int(part) for part in value.split("-"))
+        # date() also rejects years calendar accepts, such as 0000
+        return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+    except (AttributeError, ValueError, calendar.IllegalMonthError):
+        raise InvalidReportPeriod("month must be in YYYY-MM format")
+
+
+def _tax_totals():
+    return {"taxable_value": 0, "cgst": 0, "sgst": 0, "igst": 0}
+
+
+def _to_amounts(totals):
+    return {key: from_paise(value) if key in _AMOUNT_KEYS else value for key, value in totals.items()}
+
+
+def gstr1_report(outlet_id, start_date, end_date):
+    """
+    GSTR-1 style summary of an outlet's orders billed between two dates.
+
+    Streams the order lines once, ordered by order, keeping only running
+    totals: one row per B2B invoice (customer with a GSTIN), B2C totals per
+    place of supply, and HSN-wise quantity / value / tax. Line-level tax for
+    the HSN summary is allocated with the pricing engine on integer paise.
+    """
+    lines = OrderItem.objects.filter(
+        order__outlet_id=outlet_id,
+        order__date_of_billing__gte=start_date,
+        order__date_of_billing__lte=end_date,
+    ).order_by("order_id", "id").values_list(*_LINE_FIELDS).iterator(chunk_size=GST_REPORT_CHUNK_SIZE)
+
+    b2b = []
+    b2c = defaultdict(lambda: {"invoice_count": 0, "invoice_value": 0, **_tax_totals()})
+    hsn = defaultdict(lambda: {"quantity": 0, "total_value": 0, **_tax_totals()})
+
+    current_order = None
+    for (order_id, invoice_number, billing_date, discount, net, cgst, sgst, igst,
+         customer_name, gst_number, state, hsn_code, quantity, line_total) in lines:
+
+        intra_state = is_intra_state(state)
+        discount_bp = to_paise(discount or 0)
+
+        if order_id != current_order:
+            # First line of a new order: book the invoice with its stored totals
+            current_order = order_id
+            net, cgst, sgst, igst = (to_paise(value or 0) for value in (net, cgst, sgst, igst))
+            tax = {"taxable_value": net - cgst - sgst - igst, "cgst": cgst, "sgst": sgst, "igst": igst}
+
+            if gst_number:
+                b2b.append({
+                    "gstin": gst_number,
+                    "receiver_name": customer_name,
+                    "invoice_number": invoice_number,
+                    "invoice_date": billing_date,
+                    "invoice_value": net,
+                    "place_of_supply": state,
+                    "rate": GST_RATE_PERCENT,
+                    **tax,
+                })
+            else:
+                summary = b2c[state or "Not Provided"]
+                summary["invoice_count"] += 1
+                summary["invoice_value"] += net
+                for key, value in tax.items():
+                    summary[key] += value
+
+        # HSN summary: allocate the order discount and tax to this line
+        line_price = price_paise(to_paise(line_total), discount_bp, intra_state)
+        summary = hsn[hsn_code or "Not Provided"]
+        summary["quantity"] += quantity
+        summary["total_value"] += line_price[_NET]
+        summary["taxable_value"] += line_price[_TAXABLE]
+        summary["cgst"] += line_price[_CGST]
+        summary["sgst"] += line_price[_SGST]
+        summary["igst"] += line_price[_IGST]
+
+    return {
+        "outlet_id": outlet_id,
+        "start_date": start_date,
+        "end_date": end_date,
+        "b2b": [_to_amounts(row) for row in b2b],
+        "b2c": [
+            {"place_of_supply": state, "rate": GST_RATE_PERCENT, **_to_amounts(totals)}
+            for state, totals in sorted(b2c.items())
+        ],
+        "hsn": [
+            {"hsn_sac_code": code, "uqc": "NOS", **_to_amounts(totals)}
+            for code, totals in sorted(hsn.items())
+        ],
+    }
+
+
+def gstr1_xlsx_response(report, filename):
+    """The report as a workbook with B2B, B2C and HSN sheets (openpyxl write-only mode)."""
+    workbook = Workbook(write_only=True)
+    for section in ("b2b", "b2c", "hsn"):
+        sheet = workbook.create_sheet(section.upper())
+        rows = report[section]
+        if not rows:
+            continue
+        sheet.append(list(rows[0].keys()))
+        for row in rows:
+            sheet.append(list(row.values()))
+
+    report_file = tempfile.TemporaryFile(suffix=".xlsx")
+    workbook.save(report_file)
+    report_file.seek(0)
+
+    return FileResponse(
+        report_file,
+        as_attachment=True,
+        filename=filename,
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
@@ -0,0 +1,320 @@
+import csv
+import io
+import re
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from openpyxl import load_workbook
+
+from .catalog import invalidate_catalog
+from .customers import invalidate_phone_numbers
+from .models import Customer, Product, Category
+from .search import index_customers, index_products
+
+
+# Upload types read_import_rows understands
+WORKBOOK_FILE_TYPES = (".xlsx", ".xlsm")
+IMPORT_FILE_TYPES = (".csv",) + WORKBOOK_FILE_TYPES
+
+# Rows upserted per transaction
+IMPORT_CHUNK_SIZE = 1000
+
+# Failed rows listed in the report; the failed count is always exact
+IMPORT_MAX_REPORTED_ERRORS = 1000
+
+# Header aliases, matched after lowercasing and turning spaces into underscores
+CUSTOMER_IMPORT_COLUMNS = {
+    "name": "name",
+    "customer_name": "name",
+    "phone_number": "phone_number",
+    "phone": "phone_number",
+    "mobile": "phone_number",
+    "mobile_number": "phone_number",
+    "state": "state",
+    "gst_number": "gst_number",
+    "gstin": "gst_number",
+    "address": "address",
+    "reference": "reference",
+}
+
+# Customer columns an import may overwrite on an existing phone number
+CUSTOMER_UPDATE_FIELDS = ["name", "state", "gst_number", "address", "reference"]
+
+# Price list columns, in order; the first row is a header
+PRODUCT_IMPORT_COLUMNS = ["item_name", "rate_per_unit", "hsn_sac_code", "category_name"]
+
+
+class InvalidImportFile(Exception):
+    """Raised when the uploaded file cannot be read as CSV or xlsx."""
+
+
+# ==============================
+# Reading
+# ==============================
+
+def _header_key(value):
+    return re.sub(r"\s+", "_", str(value or "").strip().lower())
+
+
+def _cell(value):
+    """Text of a cell; numbers Excel stored as floats (9876543210.0) lose the '.0'."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def read_import_rows(uploaded_file, columns):
+    """
+    Yield (row_number, {field: text}) for each data row of a CSV or xlsx
+    upload. `columns` maps header aliases to fields, or is a list of fields
+    for files whose columns are positional (the header row is skipped).
+    Both formats are read a row at a time (openpyxl read-only mode for
+    xlsx), never as a whole sheet.
+    """
+    name = (uploaded_file.name or "").lower()
+    if name.endswith(".csv"):
+        rows = csv.reader(io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline=""))
+    elif name.endswith(WORKBOOK_FILE_TYPES):
+        try:
+            workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+        except Exception:
+            raise InvalidImportFile("The file is not a readable xlsx workbook.")
+        rows = workbook.active.iter_rows(values_only=True)
+    else:
+        raise InvalidImportFile("Upload a .csv or .xlsx file.")
+
+    try:
+        header = next(rows, None)
+        if not header:
+            raise InvalidImportFile("The file is empty.")
+        if isinstance(columns, dict):
+            fields = [columns.get(_header_key(value)) for value in header]
+        else:
+            fields = list(columns)
+
+        for row_number, row in enumerate(rows, start=2):
+            values = {field: _cell(value) for field, value in zip(fields, row) if field}
+            if any(values.values()):  # skip blank lines
+                yield row_number, values
+    except UnicodeDecodeError:
+        raise InvalidImportFile("CSV files must be UTF-8 encoded.")
+    finally:
+        if name.endswith(WORKBOOK_FILE_TYPES):
+            workbook.close()
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _import_chunks(rows, chunk_size, process, start_row=0, on_chunk=None):
+    """
+    Feed rows after `start_row` to `process(chunk)` a chunk at a time, each
+    in its own transaction. `on_chunk(last_row)` runs inside that
+    transaction, so a checkpoint saved there commits with the chunk's data.
+    """
+    for chunk in _chunks((row for row in rows if row[0] > start_row), chunk_size):
+        with transaction.atomic():
+            process(chunk)
+            if on_chunk:
+                on_chunk(chunk[-1][0])
+
+
+# ==============================
+# Customers
+# ==============================
+
+def normalize_phone_number(value):
+    """
+    Ten-digit Indian mobile number from common spellings (+91 98765 43210,
+    09876543210, 919876543210), or None if it is not one.
+    """
+    digits = re.sub(r"\D", "", value or "")
+    if len(digits) == 12 and digits.startswith("91"):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith("0"):
+        digits = digits[1:]
+    return digits if re.fullmatch(r"[6-9]\d{9}", digits) else None
+
+
+def _customer_row_errors(values):
+    errors = []
+    for field in ("name", "phone_number", "state"):
+        if not values.get(field):
+            errors.append(f"{field} is required.")
+    for field in ("name", "state", "gst_number"):
+        max_length = Customer._meta.get_field(field).max_length
+        if len(values.get(field, "")) > max_length:
+            errors.append(f"{field} is longer than {max_length} characters.")
+    return errors
+
+
+def _upsert_customers(outlet, chunk, report):
+    """Validate and upsert one chunk of (row_number, values). Fills the report in place; runs in the chunk's transaction."""
+    def fail(row_number, values, errors):
+        report["failed"] += 1
+        if len(report["errors"]) < IMPORT_MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": row_number, "phone_number": values.get("phone_number", ""), "errors": errors})
+
+    customers = {}
+    for row_number, values in chunk:
+        errors = _customer_row_errors(values)
+        phone_number = normalize_phone_number(values.get("phone_number"))
+        if values.get("phone_number") and not phone_number:
+            errors.append("phone_number is not a valid 10 digit mobile number.")
+        if errors:
+            fail(row_number, values, errors)
+            continue
+
+        # A number repeated in the file: the last row wins, like a later import would
+        customers[phone_number] = (row_number, Customer(
+            outlet=outlet,
+            name=values["name"],
+            phone_number=phone_number,
+            state=values["state"],
+            gst_number=values.get("gst_number") or None,
+            address=values.get("address") or None,
+            reference=values.get("reference") or None,
+        ))
+
+    # Phone numbers are unique across outlets; never take over another outlet's customer
+    existing = dict(Customer.objects.filter(phone_number__in=customers).values_list("phone_number", "outlet_id"))
+    for phone_number, outlet_id in existing.items():
+        if outlet_id != outlet.id:
+            row_number, customer = customers.pop(phone_number)
+            fail(row_number, {"phone_number": phone_number}, ["phone_number belongs to a customer of another outlet."])
+
+    if not customers:
+        return
+
+    Customer.objects.bulk_create(
+        [customer for _, customer in customers.values()],
+        update_conflicts=True,
+        unique_fields=["phone_number"],
+        update_fields=CUSTOMER_UPDATE_FIELDS,
+    )
+    # bulk_create skips save(), so refresh the search index and retire the cached lookups in every process here
+    index_customers(Customer.objects.filter(phone_number__in=customers).values_list("id", flat=True))
+    invalidate_phone_numbers(customers)
+
+    updated = sum(1 for phone_number in customers if phone_number in existing)
+    report["updated"] += updated
+    report["created"] += len(customers) - updated
+
+
+def import_customers(outlet, uploaded_file, chunk_size=IMPORT_CHUNK_SIZE, start_row=0, report=None, on_chunk=None):
+    """
+    Upsert an outlet's customers from a CSV or xlsx file, keyed on the
+    normalized phone number, one transaction per chunk. Returns a report with
+    created / updated / failed counts and the failing rows with their errors.
+
+    A resumed import passes the last committed row and the report saved
+    with it; `on_chunk(last_row, report)` is called in each chunk's transaction.
+    """
+    report = report or {"created": 0, "updated": 0, "failed": 0, "errors": []}
+    _import_chunks(
+        read_import_rows(uploaded_file, CUSTOMER_IMPORT_COLUMNS),
+        chunk_size,
+        lambda chunk: _upsert_customers(outlet, chunk, report),
+        start_row,
+        on_chunk and (lambda last_row: on_chunk(last_row, report)),
+    )
+    report["errors_truncated"] = report["failed"] > len(report["errors"])
+    return report
+
+
+# ==============================
+# Products
+# ==============================
+
+def _product_row(values, categories):
+    """A Product for a price list row, or (None, reason) when the row is skipped."""
+    item_name = values.get("item_name", "")
+    if not item_name:
+        return None, "item_name is required."
+    if len(item_name) > Product._meta.get_field("item_name").max_length:
+        return None, "item_name is too long."
+
+    try:
+        rate_per_unit = Decimal(values.get("rate_per_unit", ""))
+        if not rate_per_unit.is_finite():  # "NaN" / "Infinity" parse without raising
+            raise InvalidOperation
+        rate_per_unit = rate_per_unit.quantize(Decimal("0.01"))
+    except InvalidOperation:
+        return None, "rate_per_unit must be a number."
+    if rate_per_unit <= 0 or rate_per_unit >= Decimal("1e8"):
+        return None, "rate_per_unit must be between 0 and 99999999.99."
+
+    hsn_sac_code = values.get("hsn_sac_code") or None
+    if hsn_sac_code and len(hsn_sac_code) > Product._meta.get_field("hsn_sac_code").max_length:
+        return None, "hsn_sac_code is too long."
+
+    category_name = values.get("category_name", "")
+    category = categories.get(category_name.lower())
+    if not category:
+        return None, f"Category '{category_name}' not found." if category_name else "category is required."
+
+    return Product(item_name=item_name, rate_per_unit=rate_per_unit, hsn_sac_code=hsn_sac_code, category=category), None
+
+
+def _insert_products(chunk, outlet_ids, categories, report):
+    """Validate one chunk of price list rows and insert it. Fills the report in place; runs in the chunk's transaction."""
+    products = []
+    for row_number, values in chunk:
+        product, reason = _product_row(values, categories)
+        if product is None:
+            report["skipped"] += 1
+            if len(report["skipped_rows"]) < IMPORT_MAX_REPORTED_ERRORS:
+                report["skipped_rows"].append({"row": row_number, "item_name": values.get("item_name", ""), "reason": reason})
+        else:
+            products.append(product)
+
+    if not products:
+        return
+
+    # Primary keys come back from the insert, so the outlet links go in as one more bulk insert
+    Outlets = Product.outlets.through
+    Product.objects.bulk_create(products)
+    Outlets.objects.bulk_create(
+        [Outlets(product_id=product.pk, outlet_id=outlet_id) for product in products for outlet_id in outlet_ids],
+        batch_size=IMPORT_CHUNK_SIZE,
+    )
+    # bulk_create skips the signals that index the products and retire the cached catalog snapshots
+    index_products([product.pk for product in products])
+    invalidate_catalog()
+
+    report["added"] += len(products)
+
+
+def import_products(uploaded_file, outlet_ids, chunk_size=IMPORT_CHUNK_SIZE, start_row=0, report=None, on_chunk=None):
+    """
+    Add the products of a price list (item name, rate, HSN/SAC code,
+    category name) to the given outlets. Rows stream in and are validated
+    and inserted a chunk at a time: one insert for the products and one for
+    their outlet links per chunk. Returns the added / skipped counts and the
+    skipped rows with reasons. Resumes like import_customers.
+    """
+    categories = {category.name.lower(): category for category in Category.objects.all()}
+    outlet_ids = list(outlet_ids)
+
+    report = report or {"added": 0, "skipped": 0, "skipped_rows": []}
+    _import_chunks(
+        read_import_rows(uploaded_file, PRODUCT_IMPORT_COLUMNS),
+        chunk_size,
+        lambda chunk: _insert_products(chunk, outlet_ids, categories, report),
+        start_row,
+        on_chunk and (lambda last_row: on_chunk(last_row, report)),
+    )
+    report["skipped_rows_truncated"] = report["skipped"] > len(report["skipped_rows"])
+    return report
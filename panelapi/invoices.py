@@ -0,0 +1,103 @@
+import re
+import time
+
+from django.db import transaction, IntegrityError, OperationalError
+from django.db.models import F
+from django.utils.timezone import now
+
+from .models import Order, InvoiceSequence
+
+
+# Number of times an allocation is retried when two counters race on the same sequence row
+INVOICE_SEQUENCE_RETRIES = 5
+
+# Invoice numbers look like <outlet_id>LT<mmyy><sequence>, e.g. 12LT102537
+INVOICE_NUMBER_PATTERN = re.compile(r'^(\d+)LT(\d{4})(\d+)$')
+
+
+def invoice_period(date=None):
+    """Billing period (mmyy) used in the invoice number."""
+    return (date or now()).strftime('%m%y')
+
+
+def invoice_prefix(outlet_id, period):
+    return f"{outlet_id}LT{period}"
+
+
+def last_issued_sequence(outlet_id, period):
+    """
+    Highest sequence number already used by existing orders of an outlet in a period.
+
+    This is the old prefix scan; it only runs when a sequence row is first created.
+    """
+    prefix = invoice_prefix(outlet_id, period)
+    invoice_numbers = Order.objects.filter(
+        outlet_id=outlet_id,
+        invoice_number__startswith=prefix
+    ).values_list('invoice_number', flat=True)
+
+    last_number = 0
+    for invoice_number in invoice_numbers.iterator():
+        sequential_part = invoice_number[len(prefix):]
+        if sequential_part.isdigit():
+            last_number = max(last_number, int(sequential_part))
+    return last_number
+
+
+def allocate_invoice_numbers(outlet_id, count=1, period=None):
+    """
+    Reserve the next `count` invoice numbers for an outlet.
+
+    The (outlet, period) sequence row is read and incremented under a row lock,
+    so concurrent counters never hand out the same number. Call it inside the
+    transaction that writes the orders so a rollback also releases the numbers.
+    """
+    period = period or invoice_period()
+
+    for attempt in range(INVOICE_SEQUENCE_RETRIES):
+        try:
+            with transaction.atomic():
+                sequence = InvoiceSequence.objects.select_for_update().filter(
+                    outlet_id=outlet_id, period=period
+                ).first()
+
+                if sequence is None:
+                    # First invoice of the month for this outlet: continue from any existing orders
+                    sequence = InvoiceSequence.objects.create(
+                        outlet_id=outlet_id,
+                        period=period,
+                        last_number=last_issued_sequence(outlet_id, period),
+                    )
+
+                first_number = sequence.last_number + 1
+                sequence.last_number += count
+                sequence.save(update_fields=['last_number'])
+            break
+        except (IntegrityError, OperationalError):
+            # Another counter created or locked the row first; back off and try again
+            if attempt == INVOICE_SEQUENCE_RETRIES - 1:
+                raise
+            time.sleep(0.05 * (attempt + 1))
+
+    prefix = invoice_prefix(outlet_id, period)
+    return [f"{prefix}{number}" for number in range(first_number, first_number + count)]
+
+
+def allocate_invoice_number(outlet_id, period=None):
+    """Reserve the next invoice number for an outlet."""
+    return allocate_invoice_numbers(outlet_id, 1, period)[0]
+
+
+def release_invoice_numbers(outlet_id, count, period):
+    """
+    Hand back the last `count` numbers of a block reserved earlier in the same
+    transaction, so orders that failed inside a batch do not leave gaps.
+
+    The sequence row stays locked by that earlier allocation, so nobody else
+    can have taken numbers after the block in the meantime.
+    """
+    if count <= 0:
+        return
+    InvoiceSequence.objects.filter(outlet_id=outlet_id, period=period).update(
+        last_number=F('last_number') - count
+    )
@@ -0,0 +1,26 @@
+from .imports import import_customers, import_products
+from .jobs import job_handler, save_checkpoint
+from .models import Outlet
+
+
+# Each handler reads its input from job.file, resumes after job.checkpoint
+# and commits a new checkpoint with every chunk it writes.
+
+def _import_checkpoint(job):
+    def on_chunk(last_row, report):
+        save_checkpoint(job, {"row": last_row, "report": report}, last_row - 1)  # rows after the header
+    checkpoint = job.checkpoint or {}
+    return {"start_row": checkpoint.get("row", 0), "report": checkpoint.get("report"), "on_chunk": on_chunk}
+
+
+@job_handler("import_products")
+def import_products_job(job):
+    with job.file.open("rb") as upload:
+        return import_products(upload, job.params["outlet_ids"], **_import_checkpoint(job))
+
+
+@job_handler("import_customers")
+def import_customers_job(job):
+    outlet = Outlet.objects.get(id=job.params["outlet_id"])
+    with job.file.open("rb") as upload:
+        return import_customers(outlet, upload, **_import_checkpoint(job))
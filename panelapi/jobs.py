@@ -0,0 +1,177 @@
+import logging
+import threading
+
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import F, Q
+from django.utils.timezone import now
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+# A running job whose heartbeat is older than this is assumed dead and reclaimed
+JOB_LEASE_SECONDS = 300
+
+# How often a worker refreshes the heartbeat of the job it is running, whether
+# or not a chunk has committed; well inside the lease so a slow chunk keeps it
+JOB_HEARTBEAT_SECONDS = 60
+
+# Claims of one job (including reclaims after a crash) before it is marked failed
+JOB_MAX_ATTEMPTS = 3
+
+# Jobs returned by the job listing
+JOB_LIST_LIMIT = 50
+
+# kind -> handler(job) returning the job's result; filled by @job_handler
+JOB_HANDLERS = {}
+
+
+class JobLost(Exception):
+    """Raised inside a handler when another worker has reclaimed its job."""
+
+
+def job_handler(kind):
+    """Register a function as the handler for jobs of `kind`."""
+    def register(handler):
+        JOB_HANDLERS[kind] = handler
+        return handler
+    return register
+
+
+def enqueue_job(kind, params=None, upload=None):
+    """Queue a job, storing an uploaded input file with it. Returns the Job."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = Job(kind=kind, params=params or {})
+    if upload is not None:
+        job.file.save(upload.name, upload, save=False)
+    job.save()
+    return job
+
+
+def save_checkpoint(job, checkpoint, processed):
+    """
+    Record a handler's progress. Call it inside the transaction that writes
+    the chunk, so the data and the checkpoint commit (or roll back) together.
+    Raises JobLost if this worker no longer owns the job.
+    """
+    updated = Job.objects.filter(pk=job.pk, worker=job.worker, status=Job.RUNNING).update(
+        checkpoint=checkpoint, processed=processed, heartbeat_at=now()
+    )
+    if not updated:
+        raise JobLost(f"Job {job.pk} was reclaimed by another worker")
+    job.checkpoint, job.processed = checkpoint, processed
+
+
+def job_status(job, with_result=True):
+    return {
+        "job_id": job.pk,
+        "kind": job.kind,
+        "status": job.status,
+        "processed": job.processed,
+        "result": job.result if with_result else None,
+        "error": job.error or None,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+# ==============================
+# Worker
+# ==============================
+
+class JobHeartbeat:
+    """
+    Refreshes a claimed job's heartbeat from a background thread while its
+    handler runs, so a chunk slower than the lease does not get the job
+    reclaimed and run twice. Once the job is found reclaimed it stops; the
+    handler's next save_checkpoint then raises JobLost.
+    """
+
+    def __init__(self, job, interval=JOB_HEARTBEAT_SECONDS):
+        self.job = job
+        self.interval = interval
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-{job.pk}-heartbeat", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._done.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._done.wait(self.interval):
+                try:
+                    alive = Job.objects.filter(pk=self.job.pk, worker=self.job.worker, status=Job.RUNNING).update(
+                        heartbeat_at=now()
+                    )
+                except Exception:
+                    # e.g. the database is briefly locked; the next beat retries well within the lease
+                    logger.warning("Heartbeat of job %s failed", self.job.pk, exc_info=True)
+                    continue
+                if not alive:
+                    return
+        finally:
+            connection.close()  # the thread's own connection
+
+def claim_next_job(worker):
+    """
+    Take the oldest queued job, or a running one whose lease has expired,
+    with a compare-and-set UPDATE so two workers never claim the same job.
+    Returns the claimed Job or None.
+    """
+    stale = now() - timedelta(seconds=JOB_LEASE_SECONDS)
+    candidates = Job.objects.filter(
+        Q(status=Job.QUEUED) | Q(status=Job.RUNNING, heartbeat_at__lt=stale)
+    ).order_by("created_at", "id").values_list("id", "status", "heartbeat_at")[:10]
+
+    for job_id, status, heartbeat_at in candidates:
+        claimed = Job.objects.filter(pk=job_id, status=status, heartbeat_at=heartbeat_at).update(
+            status=Job.RUNNING, worker=worker, heartbeat_at=now(), attempts=F("attempts") + 1
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def _finish(job, **fields):
+    finished = Job.objects.filter(pk=job.pk, worker=job.worker).update(
+        finished_at=now(), heartbeat_at=now(), file="", **fields
+    )
+    if finished and job.file:
+        # The input is no longer needed once the job has finished, either way; a
+        # worker that lost the job must leave it to the one that reclaimed it
+        job.file.delete(save=False)
+
+
+def run_job(job, heartbeat_interval=JOB_HEARTBEAT_SECONDS):
+    """Run a claimed job's handler, keeping its lease alive, and record the outcome."""
+    if job.attempts > JOB_MAX_ATTEMPTS:
+        _finish(job, status=Job.FAILED, error=f"Gave up after {JOB_MAX_ATTEMPTS} attempts.")
+        return
+
+    if job.started_at is None:
+        job.started_at = now()
+        Job.objects.filter(pk=job.pk).update(started_at=job.started_at)
+
+    try:
+        with JobHeartbeat(job, heartbeat_interval):
+            result = JOB_HANDLERS[job.kind](job)
+    except JobLost:
+        logger.warning("Job %s was reclaimed by another worker; stopping", job.pk)
+        return
+    except Exception as e:
+        logger.exception("Job %s (%s) failed", job.pk, job.kind)
+        _finish(job, status=Job.FAILED, error=str(e) or e.__class__.__name__)
+        return
+
+    _finish(job, status=Job.SUCCEEDED, result=result, error="")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from panelapi.specifications import deduplicate_specifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge order item specifications with identical content into one row, repoint their order items "
+        "and recompute signatures. Run after deleting lookup rows (brands, colours ...) that specifications referenced."
+    )
+
+    def handle(self, *args, **options):
+        kept, removed = deduplicate_specifications()
+        self.stdout.write(self.style.SUCCESS(f"{kept} specifications kept, {removed} duplicates removed."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from panelapi.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete Idempotency-Key records whose TTL has expired."
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} expired idempotency keys deleted."))
@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from panelapi.changelog import SYNC_TOMBSTONE_RETENTION_DAYS
+from panelapi.models import SyncTombstone
+
+
+class Command(BaseCommand):
+    help = "Delete counter sync tombstones older than the retention period (counters that far behind resync in full)."
+
+    def handle(self, *args, **options):
+        cutoff = now() - timedelta(days=SYNC_TOMBSTONE_RETENTION_DAYS)
+        deleted, _ = SyncTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} sync tombstones deleted."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from panelapi.search import rebuild_customer_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the customer search tokens (run once after migrating, or after bulk edits that skip save())."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--outlet', type=int, help="Only rebuild this outlet ID.")
+
+    def handle(self, *args, **options):
+        indexed = rebuild_customer_search_index(options['outlet'])
+        self.stdout.write(self.style.SUCCESS(f"{indexed} customers indexed."))
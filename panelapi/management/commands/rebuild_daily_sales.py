@@ -0,0 +1,24 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from panelapi.rollups import rebuild_daily_sales
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyOutletSales rollup from the orders table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--outlet', type=int, help="Only rebuild this outlet ID.")
+        parser.add_argument('--start-date', help="First billing date to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--end-date', help="Last billing date to rebuild (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        try:
+            start_date = date.fromisoformat(options['start_date']) if options['start_date'] else None
+            end_date = date.fromisoformat(options['end_date']) if options['end_date'] else None
+        except ValueError:
+            raise CommandError("Dates must be in YYYY-MM-DD format.")
+
+        written = rebuild_daily_sales(options['outlet'], start_date, end_date)
+        self.stdout.write(self.style.SUCCESS(f"{written} daily sales rows rebuilt."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from panelapi.search import rebuild_product_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product search tokens (run once after migrating, or after bulk edits that skip save())."
+
+    def handle(self, *args, **options):
+        indexed = rebuild_product_search_index()
+        self.stdout.write(self.style.SUCCESS(f"{indexed} products indexed."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from panelapi.models import Order
+from panelapi.repricing import reprice_orders
+
+
+class Command(BaseCommand):
+    help = "Recompute stored order totals and GST with the shared pricing engine."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--outlet', type=int, help="Only reprice orders of this outlet ID.")
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Orders read and written per query.")
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many orders would change.")
+
+    def handle(self, *args, **options):
+        orders = Order.objects.all()
+        if options['outlet']:
+            orders = orders.filter(outlet_id=options['outlet'])
+
+        checked, repriced = reprice_orders(orders, options['chunk_size'], options['dry_run'])
+
+        verb = "would be repriced" if options['dry_run'] else "repriced"
+        self.stdout.write(self.style.SUCCESS(f"{checked} orders checked, {repriced} {verb}."))
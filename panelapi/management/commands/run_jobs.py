@@ -0,0 +1,40 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from panelapi.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (imports, exports, reports). Start one or more of these next to the web server."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit when the queue is empty instead of polling.")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to wait between polls of an empty queue.")
+        parser.add_argument('--worker-id', default=f"{socket.gethostname()}:{os.getpid()}", help="Name recorded on claimed jobs.")
+
+    def handle(self, *args, **options):
+        worker = options['worker_id']
+        self.stdout.write(f"Job worker {worker} started.")
+
+        try:
+            while True:
+                close_old_connections()
+                job = claim_next_job(worker)
+
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                self.stdout.write(f"Running {job.kind} job {job.pk} (attempt {job.attempts}).")
+                run_job(job)
+                job.refresh_from_db()
+                self.stdout.write(f"Job {job.pk} {job.status}.")
+        except KeyboardInterrupt:
+            # A job cut off here is reclaimed from its last checkpoint once its lease expires
+            self.stdout.write("Job worker stopped.")
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from panelapi.invoices import INVOICE_NUMBER_PATTERN
+from panelapi.models import Order, InvoiceSequence
+
+
+class Command(BaseCommand):
+    help = "Seed the per-outlet invoice sequences from the invoice numbers of existing orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--outlet', type=int, help="Only seed sequences for this outlet ID.")
+
+    def handle(self, *args, **options):
+        orders = Order.objects.all()
+        if options['outlet']:
+            orders = orders.filter(outlet_id=options['outlet'])
+
+        # Highest sequence per (outlet, period) found in existing invoice numbers
+        last_numbers = {}
+        for outlet_id, invoice_number in orders.values_list('outlet_id', 'invoice_number').iterator():
+            match = INVOICE_NUMBER_PATTERN.match(invoice_number or '')
+            if not match or int(match.group(1)) != outlet_id:
+                continue
+
+            key = (outlet_id, match.group(2))
+            last_numbers[key] = max(last_numbers.get(key, 0), int(match.group(3)))
+
+        created = updated = 0
+        with transaction.atomic():
+            for (outlet_id, period), last_number in last_numbers.items():
+                sequence, was_created = InvoiceSequence.objects.select_for_update().get_or_create(
+                    outlet_id=outlet_id, period=period, defaults={'last_number': last_number}
+                )
+                if was_created:
+                    created += 1
+                elif sequence.last_number < last_number:
+                    # Never move a sequence backwards, only catch it up with existing orders
+                    sequence.last_number = last_number
+                    sequence.save(update_fields=['last_number'])
+                    updated += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Invoice sequences seeded: {created} created, {updated} updated."
+        ))
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panelapi', '0015_orderitemspecification_orderitem_specification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(max_length=4)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+                ('outlet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invoice_sequences', to='panelapi.outlet')),
+            ],
+            options={
+                'unique_together': {('outlet', 'period')},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panelapi', '0019_sync_change_tracking'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['outlet', 'date_of_billing', 'id'], name='order_outlet_billing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['outlet', 'invoice_number'], name='order_outlet_invoice_idx'),
+        ),
+    ]
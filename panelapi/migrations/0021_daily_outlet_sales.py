@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panelapi', '0020_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOutletSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('mode_of_payment', models.CharField(choices=[('CASH', 'Cash'), ('CARD', 'Card'), ('UPI', 'UPI'), ('ONLINE', 'Online Payment'), ('OTHER', 'Other')], max_length=20)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('gross', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('discount', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('cgst', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('sgst', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('igst', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('outlet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='panelapi.outlet')),
+            ],
+            options={
+                'unique_together': {('outlet', 'date', 'mode_of_payment')},
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:41
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Frozen copy of the customer tokenisation in panelapi.search as of this
+# migration; later edits to that module must not change what it does
+TOKEN_MAX_LENGTH = 64
+PHONE_MIN_SUFFIX = 3
+BATCH_SIZE = 2000
+
+
+def words(text):
+    text = unicodedata.normalize('NFC', text or '').casefold()
+    found, start = [], None
+    for i, char in enumerate(text):
+        if char.isalnum() or (start is not None and unicodedata.category(char).startswith('M')):
+            if start is None:
+                start = i
+        elif start is not None:
+            found.append(text[start:i])
+            start = None
+    if start is not None:
+        found.append(text[start:])
+    return found
+
+
+def customer_tokens(name, phone_number):
+    tokens = {word[:TOKEN_MAX_LENGTH] for word in words(name)}
+    digits = re.sub(r'\D', '', phone_number or '')
+    tokens.update(digits[i:] for i in range(len(digits) - PHONE_MIN_SUFFIX + 1))
+    return tokens
+
+
+def index_customers(apps, schema_editor):
+    """Index every existing customer, as rebuild_customer_search_index does."""
+    Customer = apps.get_model('panelapi', 'Customer')
+    CustomerSearchToken = apps.get_model('panelapi', 'CustomerSearchToken')
+
+    batch = []
+    customers = Customer.objects.values_list('id', 'outlet_id', 'name', 'phone_number')
+    for customer_id, outlet_id, name, phone_number in customers.iterator(chunk_size=BATCH_SIZE):
+        batch += [
+            CustomerSearchToken(customer_id=customer_id, outlet_id=outlet_id, token=token)
+            for token in customer_tokens(name, phone_number)
+        ]
+        if len(batch) >= BATCH_SIZE:
+            CustomerSearchToken.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+            batch = []
+    if batch:
+        CustomerSearchToken.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panelapi', '0021_daily_outlet_sales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='panelapi.customer')),
+                ('outlet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='customer_search_tokens', to='panelapi.outlet')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['outlet', 'token', 'customer'], name='customer_search_token_idx')],
+            },
+        ),
+        migrations.RunPython(index_customers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:53
+
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Frozen copy of the product tokenisation in panelapi.search as of this
+# migration; later edits to that module must not change what it does
+TOKEN_MAX_LENGTH = 64
+BATCH_SIZE = 2000
+
+
+def words(text):
+    text = unicodedata.normalize('NFC', text or '').casefold()
+    found, start = [], None
+    for i, char in enumerate(text):
+        if char.isalnum() or (start is not None and unicodedata.category(char).startswith('M')):
+            if start is None:
+                start = i
+        elif start is not None:
+            found.append(text[start:i])
+            start = None
+    if start is not None:
+        found.append(text[start:])
+    return found
+
+
+def index_products(apps, schema_editor):
+    """Index every existing product, as rebuild_product_search_index does."""
+    Product = apps.get_model('panelapi', 'Product')
+    ProductSearchToken = apps.get_model('panelapi', 'ProductSearchToken')
+
+    batch = []
+    products = Product.objects.values_list('id', 'item_name', 'category__name', 'hsn_sac_code')
+    for product_id, item_name, category_name, hsn_sac_code in products.iterator(chunk_size=BATCH_SIZE):
+        tokens = {word[:TOKEN_MAX_LENGTH] for word in words(f"{item_name} {category_name or ''} {hsn_sac_code or ''}")}
+        batch += [ProductSearchToken(product_id=product_id, token=token) for token in tokens]
+        if len(batch) >= BATCH_SIZE:
+            ProductSearchToken.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+            batch = []
+    if batch:
+        ProductSearchToken.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panelapi', '0023_background_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='panelapi.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'product'], name='product_search_token_idx')],
+            },
+        ),
+        migrations.RunPython(index_products, migrations.RunPython.noop),
+    ]
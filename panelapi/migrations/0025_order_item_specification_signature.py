@@ -0,0 +1,75 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:58
+
+import hashlib
+
+from django.db import migrations, models
+from django.db.models import Case, When, Value
+
+
+# Frozen copy of panelapi.specifications as of this migration; later edits to
+# that module must not change what this migration does
+LOOKUP_FIELDS = [
+    'brand', 'pattern', 'stain_type', 'defect_type', 'material_type', 'starch_type', 'detergent_type',
+    'detergent_scent_type', 'wash_temperature_type', 'fabric_softener_type', 'colour', 'top_up_service',
+]
+FLAG_FIELDS = ['box', 'fold']
+BATCH_SIZE = 500
+
+
+def signature(row):
+    parts = [f"{field}={row[f'{field}_id'] or ''}" for field in LOOKUP_FIELDS]
+    parts += [f"{field}={int(bool(row[field]))}" for field in FLAG_FIELDS]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def merge(Specification, OrderItem, duplicates):
+    OrderItem.objects.filter(specification_id__in=duplicates).update(specification_id=Case(
+        *[When(specification_id=duplicate_id, then=Value(kept_id)) for duplicate_id, kept_id in duplicates.items()]
+    ))
+    Specification.objects.filter(id__in=duplicates).delete()
+
+
+def deduplicate(apps, schema_editor):
+    """Keep the oldest row of each distinct specification, repoint order items at it and sign it."""
+    Specification = apps.get_model('panelapi', 'OrderItemSpecification')
+    OrderItem = apps.get_model('panelapi', 'OrderItem')
+    fields = ['id', *[f'{field}_id' for field in LOOKUP_FIELDS], *FLAG_FIELDS]
+
+    kept, duplicates, last_id = {}, {}, 0
+    while True:
+        rows = list(Specification.objects.filter(id__gt=last_id).order_by('id').values(*fields)[:BATCH_SIZE])
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+        for row in rows:
+            kept_id = kept.setdefault(signature(row), row['id'])
+            if kept_id != row['id']:
+                duplicates[row['id']] = kept_id
+        if len(duplicates) >= BATCH_SIZE:
+            merge(Specification, OrderItem, duplicates)
+            duplicates = {}
+    if duplicates:
+        merge(Specification, OrderItem, duplicates)
+
+    # Every signature is still NULL here, so no update can collide
+    Specification.objects.bulk_update(
+        [Specification(id=spec_id, signature=value) for value, spec_id in kept.items()],
+        ['signature'],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panelapi', '0024_product_search_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitemspecification',
+            name='signature',
+            field=models.CharField(editable=False, max_length=40, null=True, unique=True),
+        ),
+        migrations.RunPython(deduplicate, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.timezone import now
 
 User = get_user_model()  # Reference to the custom user model
@@ -21,6 +22,7 @@ class Outlet(models.Model):
 
 class Category(models.Model):
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change tracking for counter sync
 
     def __str__(self):
         return self.name
@@ -37,6 +39,7 @@ class Product(models.Model):
     hsn_sac_code = models.CharField(max_length=20, blank=True, null=True)
     outlets = models.ManyToManyField(Outlet, related_name="products")  # Many-to-Many relationship with Outlet
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name="products")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change tracking for counter sync
 
     def __str__(self):
         return self.item_name
@@ -76,6 +79,9 @@ class Customer(models.Model):
     address = models.TextField(blank=True, null=True)  # Added address field
     reference = models.TextField(blank=True, null=True)  # Added address field
 
+    # No composite index: phone_number is unique, so its own index serves the
+    # counter lookup by outlet and phone, and the outlet FK index the listings
+
     def __str__(self):
         return self.name
     
@@ -110,6 +116,16 @@ class Order(models.Model):
     # New field to store the total amount after GST
     total_after_gst = models.DecimalField(max_digits=15, decimal_places=2, default=0.00,blank=True, null=True)
     total_after_discount = models.DecimalField(max_digits=15, decimal_places=2, default=0.00,blank=True, null=True)
+    # Bumped whenever the order is edited; keys the rendered-bill cache
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            # Outlet order listings: billing date range, paged newest first on (date_of_billing, id)
+            models.Index(fields=['outlet', 'date_of_billing', 'id'], name='order_outlet_billing_idx'),
+            # Invoice lookups and the per-outlet invoice number prefix scan
+            models.Index(fields=['outlet', 'invoice_number'], name='order_outlet_invoice_idx'),
+        ]
 
     def __str__(self):
         return f"Order {self.order_number} - {self.outlet.owner_name}"
@@ -150,6 +166,7 @@ class OrderItem(models.Model):
 class Brand(models.Model):
     """Garment / item brand name."""
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change tracking for counter sync
 
     def __str__(self):
         return self.name
@@ -158,6 +175,7 @@ class Brand(models.Model):
 class Pattern(models.Model):
     """Pattern types e.g., checks, stripes, plain."""
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change tracking for counter sync
 
     def __str__(self):
         return self.name
@@ -166,6 +184,7 @@ class Pattern(models.Model):
 class StainType(models.Model):
     """Types of stains e.g., oil, ink, mud."""
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change tracking for counter sync
 
     def __str__(self):
         return self.name
@@ -174,6 +193,7 @@ class StainType(models.Model):
 class DefectType(models.Model):
     """Types of defects e.g., tear, missing button."""
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change tracking for counter sync
 
     def __str__(self):
         return self.name
@@ -182,6 +202,7 @@ class DefectType(models.Model):
 class MaterialType(models.Model):
     """Fabric / material types e.g., cotton, silk, wool."""
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change tracking for counter sync
 
     def __str__(self):
         return self.name
@@ -190,6 +211,7 @@ class MaterialType(models.Model):
 class StarchType(models.Model):
     """Starch levels / types e.g., no starch, light, medium, heavy."""
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change tracking for counter sync
 
     def __str__(self):
         return self.name
@@ -198,6 +220,7 @@ class StarchType(models.Model):
 class DetergentType(models.Model):
     """Detergent categories e.g., regular, premium, hypoallergenic."""
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change tracking for counter sync
 
     def __str__(self):
         return self.name
@@ -206,6 +229,7 @@ class DetergentType(models.Model):
 class DetergentScentType(models.Model):
     """Detergent fragrance options e.g., lavender, lemon, no fragrance."""
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change tracking for counter sync
 
     def __str__(self):
         return self.name
@@ -214,6 +238,7 @@ class DetergentScentType(models.Model):
 class WashTemperatureType(models.Model):
     """Wash temperature presets e.g., cold, warm, hot, 30°C, 40°C."""
     name = models.CharField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change tracking for counter sync
 
     def __str__(self):
         return self.name
@@ -222,6 +247,7 @@ class WashTemperatureType(models.Model):
 class FabricSoftenerType(models.Model):
     """Fabric softener options e.g., normal, premium, no softener."""
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change tracking for counter sync
 
     def __str__(self):
         return self.name
@@ -230,6 +256,7 @@ class FabricSoftenerType(models.Model):
 class Colour(models.Model):
     """Colour options for garments e.g., white, black, navy blue, pastel."""
     name = models.CharField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change tracking for counter sync
 
     def __str__(self):
         return self.name
@@ -238,6 +265,7 @@ class Colour(models.Model):
 class TopUpService(models.Model):
     """Extra value-added services like express delivery, steam press, etc."""
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change tracking for counter sync
 
     def __str__(self):
         return self.name
@@ -249,7 +277,7 @@ class TopUpService(models.Model):
 # ==============================
 
 class OrderItemSpecification(models.Model):
-    """Holds detailed specs for a particular order item."""
+    """Holds detailed specs for order items; a row is shared by every item with the same specs."""
     brand = models.ForeignKey("Brand", on_delete=models.SET_NULL, null=True, blank=True)
     pattern = models.ForeignKey("Pattern", on_delete=models.SET_NULL, null=True, blank=True)
     stain_type = models.ForeignKey("StainType", on_delete=models.SET_NULL, null=True, blank=True)
@@ -266,7 +294,184 @@ class OrderItemSpecification(models.Model):
     box = models.BooleanField(default=False)
     fold = models.BooleanField(default=False)
 
+    # Hash of the lookups and flags above; identical specifications share one row
+    signature = models.CharField(max_length=40, unique=True, null=True, editable=False)
+
     def __str__(self):
         return f"Specification #{self.id}"
 
 
+
+
+
+# ==============================
+# Invoice Numbering
+# ==============================
+
+class InvoiceSequence(models.Model):
+    """Last invoice sequence number issued by an outlet in a billing month."""
+    outlet = models.ForeignKey("Outlet", on_delete=models.CASCADE, related_name="invoice_sequences")
+    period = models.CharField(max_length=4)  # mmyy, as embedded in the invoice number
+    last_number = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('outlet', 'period')
+
+    def __str__(self):
+        return f"{self.outlet_id}LT{self.period} - {self.last_number}"
+
+
+
+# ==============================
+# Idempotent Order Placement
+# ==============================
+
+class IdempotencyKey(models.Model):
+    """Client-supplied Idempotency-Key mapped to the order (and response) it produced."""
+    key = models.CharField(max_length=255)
+    outlet = models.ForeignKey("Outlet", on_delete=models.CASCADE, related_name="idempotency_keys")
+    order = models.ForeignKey("Order", on_delete=models.CASCADE, related_name="idempotency_keys")
+    response = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)  # stored once the bill is rendered
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ('outlet', 'key')
+
+    def __str__(self):
+        return f"{self.key} - {self.order.order_number}"
+
+
+
+# ==============================
+# Counter Sync
+# ==============================
+
+class SyncTombstone(models.Model):
+    """
+    Record of a catalog or master-data row that counters must drop.
+    With an outlet set, the row was only removed from that outlet's catalog.
+    """
+    model = models.CharField(max_length=50)  # sync key, e.g. "products" or "brands"
+    object_id = models.PositiveIntegerField()
+    outlet = models.ForeignKey("Outlet", on_delete=models.CASCADE, null=True, blank=True, related_name="sync_tombstones")
+    deleted_at = models.DateTimeField(default=now, db_index=True)
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} - {self.deleted_at}"
+
+
+
+# ==============================
+# Reporting
+# ==============================
+
+class DailyOutletSales(models.Model):
+    """Sales of an outlet for one billing date and payment mode, kept up to date as orders are written."""
+    outlet = models.ForeignKey("Outlet", on_delete=models.CASCADE, related_name="daily_sales")
+    date = models.DateField()
+    mode_of_payment = models.CharField(max_length=20, choices=Order.PAYMENT_MODES)
+    order_count = models.PositiveIntegerField(default=0)
+    item_count = models.PositiveIntegerField(default=0)  # garments, i.e. the sum of item quantities
+    gross = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    discount = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    cgst = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    sgst = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    igst = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+
+    class Meta:
+        unique_together = ('outlet', 'date', 'mode_of_payment')
+
+    def __str__(self):
+        return f"{self.outlet_id} - {self.date} - {self.mode_of_payment}"
+
+
+
+# ==============================
+# Background jobs
+# ==============================
+
+class Job(models.Model):
+    """
+    A unit of background work (import, export, report) run by the run_jobs
+    worker. Handlers commit their progress as `checkpoint` with each chunk,
+    so a job whose worker died is picked up again where it stopped.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUSES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=50)  # handler name, e.g. "import_products"
+    status = models.CharField(max_length=20, choices=STATUSES, default=QUEUED)
+    params = models.JSONField(encoder=DjangoJSONEncoder, default=dict, blank=True)
+    file = models.FileField(upload_to="jobs/%Y/%m/", blank=True)  # uploaded input, removed once the job finishes
+    processed = models.PositiveIntegerField(default=0)  # rows (or items) done so far
+    checkpoint = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)  # handler state committed with the last chunk
+    result = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # a running job without a recent heartbeat is reclaimed
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Worker queue scan
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} - {self.status}"
+
+
+
+# ==============================
+# Search
+# ==============================
+
+class CustomerSearchToken(models.Model):
+    """
+    Lowercased name words and phone number suffixes of a customer, kept in
+    step with the customer on save. Prefix search is a range scan on the
+    (outlet, token) index instead of a LIKE '%...%' table scan.
+    """
+    customer = models.ForeignKey("Customer", on_delete=models.CASCADE, related_name="search_tokens")
+    outlet = models.ForeignKey("Outlet", on_delete=models.CASCADE, related_name="customer_search_tokens")
+    token = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            # Covers the search query: token range per outlet, grouped by customer
+            models.Index(fields=['outlet', 'token', 'customer'], name='customer_search_token_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.customer_id} - {self.token}"
+
+
+class ProductSearchToken(models.Model):
+    """
+    Lowercased words of a product's name and category, and its HSN/SAC code.
+    Products are shared between outlets, so tokens are global and searches
+    are scoped through the product-outlet table.
+    """
+    product = models.ForeignKey("Product", on_delete=models.CASCADE, related_name="search_tokens")
+    token = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            # Covers the driving range scan of a search
+            models.Index(fields=['token', 'product'], name='product_search_token_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} - {self.token}"
@@ -0,0 +1,71 @@
+import base64
+import json
+from datetime import date
+
+from django.db.models import Q
+
+
+# Orders per page when the client does not ask for a page size, and the most it may ask for
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class InvalidPageRequest(Exception):
+    """Raised when the cursor or page size of a listing request is malformed."""
+
+
+def encode_cursor(date_of_billing, pk):
+    """Opaque cursor pointing just past (date_of_billing, pk)."""
+    raw = json.dumps([date_of_billing.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        date_of_billing, pk = json.loads(raw)
+        return date.fromisoformat(date_of_billing), int(pk)
+    except (ValueError, TypeError):
+        raise InvalidPageRequest('Invalid cursor')
+
+
+def parse_page_size(value):
+    if value in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        page_size = 0
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise InvalidPageRequest(f'page_size must be between 1 and {MAX_PAGE_SIZE}')
+    return page_size
+
+
+def paginate_orders(orders, query_params):
+    """
+    One page of an order queryset, newest first, using keyset pagination on
+    (date_of_billing, id).
+
+    The page continues from the `cursor` query parameter with a range
+    condition instead of an OFFSET, so deep pages cost the same as the
+    first one. Returns (orders, page_size, next_cursor); next_cursor is
+    None on the last page.
+    """
+    page_size = parse_page_size(query_params.get('page_size'))
+    orders = orders.order_by('-date_of_billing', '-id')
+
+    cursor = query_params.get('cursor')
+    if cursor:
+        date_of_billing, pk = decode_cursor(cursor)
+        orders = orders.filter(
+            Q(date_of_billing__lt=date_of_billing) | Q(date_of_billing=date_of_billing, id__lt=pk)
+        )
+
+    # Fetch one extra row to know whether there is a next page
+    page = list(orders[:page_size + 1])
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        next_cursor = encode_cursor(page[-1].date_of_billing, page[-1].pk)
+
+    return page, page_size, next_cursor
@@ -0,0 +1,130 @@
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+
+# Order pricing: line totals, discount, GST split, round-off and grand total.
+# All arithmetic is done on integer paise so order placement, discount edits,
+# bills, reports and bulk repricing all get identical results. Prices are
+# GST-inclusive: tax is extracted from the discounted total, never added on top.
+GST_RATE_PERCENT = 18
+
+# Supplies within the home state are split into CGST + SGST, everything else is IGST
+HOME_STATE = "uttar pradesh"
+
+OrderPrice = namedtuple("OrderPrice", [
+    "total_amount",          # sum of line totals
+    "discount",              # discount amount
+    "total_after_discount",  # net payable before rounding, GST included
+    "taxable_value",         # net amount without GST
+    "total_cgst",
+    "total_sgst",
+    "total_igst",
+    "total_gst",
+    "round_off",             # grand_total - total_after_discount
+    "grand_total",           # rounded to the rupee
+])
+
+
+# ==============================
+# Paise conversion
+# ==============================
+
+def to_paise(amount):
+    """Rupees (Decimal, str, int or float) to integer paise, rounding half up."""
+    return int((Decimal(str(amount)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def from_paise(paise):
+    """Integer paise to a two-place Decimal amount."""
+    return Decimal(paise).scaleb(-2).quantize(Decimal("0.01"))
+
+
+def _div_round(numerator, denominator):
+    """Integer division rounding half up (amounts are never negative)."""
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+def is_intra_state(state):
+    return (state or "").strip().lower() == HOME_STATE
+
+
+# ==============================
+# Scalar API
+# ==============================
+
+def line_total(rate_per_unit, quantity):
+    """Total of one order line, as a two-place Decimal."""
+    quantity_hundredths = to_paise(quantity)  # quantity scaled by 100 like an amount
+    return from_paise(_div_round(to_paise(rate_per_unit) * quantity_hundredths, 100))
+
+
+def price_paise(total, discount_bp, intra_state):
+    """
+    Core pricing on integers: total in paise and discount in basis points
+    (percentage x 100). Returns the OrderPrice fields as paise.
+    """
+    discount = _div_round(total * discount_bp, 10000)
+    net = total - discount
+
+    # GST is already included in the net amount; extract it
+    if intra_state:
+        # CGST and SGST are each half the rate on the taxable value, rounded once so they are always equal
+        cgst = sgst = _div_round(net * (GST_RATE_PERCENT // 2), 100 + GST_RATE_PERCENT)
+        igst = 0
+        gst = cgst + sgst
+        taxable = net - gst
+    else:
+        taxable = _div_round(net * 100, 100 + GST_RATE_PERCENT)
+        gst = net - taxable
+        cgst = sgst = 0
+        igst = gst
+
+    grand_total = _div_round(net, 100) * 100
+    return total, discount, net, taxable, cgst, sgst, igst, gst, grand_total - net, grand_total
+
+
+def price_order(line_totals, discount_percentage, customer_state):
+    """Price one order from its line totals (Decimal amounts)."""
+    total = sum(to_paise(amount) for amount in line_totals)
+    paise = price_paise(total, to_paise(discount_percentage or 0), is_intra_state(customer_state))
+    return OrderPrice(*(from_paise(value) for value in paise))
+
+
+def order_price(order):
+    """Price an order from its stored total and discount (e.g. for its bill)."""
+    customer = order.customer
+    return price_order([order.total_amount], order.discount_percentage, customer.state if customer else "")
+
+
+def apply_price(order, price):
+    """Copy a computed price onto the Order's stored total fields."""
+    order.total_amount = price.total_amount
+    order.total_after_discount = price.total_after_discount
+    order.total_gst = price.total_gst
+    order.total_cgst = price.total_cgst
+    order.total_sgst = price.total_sgst
+    order.total_igst = price.total_igst
+    order.total_after_gst = price.total_after_discount  # prices are GST-inclusive
+
+
+# ==============================
+# Batch API
+# ==============================
+
+def price_orders(totals, discount_percentages, customer_states):
+    """
+    Price many orders in one pass over parallel columns of order totals,
+    discount percentages and customer states. Amounts are scaled to integer
+    paise once up front, so the per-order work is plain integer arithmetic.
+
+    Returns a list of OrderPrice, in input order.
+    """
+    totals = [to_paise(total or 0) for total in totals]
+    discounts = [to_paise(discount or 0) for discount in discount_percentages]
+    intra_state = [is_intra_state(state) for state in customer_states]
+
+    return [
+        OrderPrice(*(from_paise(value) for value in price_paise(total, discount_bp, intra)))
+        for total, discount_bp, intra in zip(totals, discounts, intra_state)
+    ]
+
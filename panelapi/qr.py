@@ -0,0 +1,41 @@
+import base64
+import qrcode
+
+from decimal import Decimal
+from functools import lru_cache
+from io import BytesIO
+
+
+# UPI payment details printed on every bill
+UPI_ID = "vyapar.171035825947@hdfcbank"
+UPI_PAYEE_NAME = "Laundry Talks"
+
+# Distinct payloads kept in memory; amount-bearing QRs are evicted least-recently-used first
+QR_CACHE_SIZE = 512
+
+
+def upi_payment_url(amount=None):
+    """UPI deep link for the merchant, optionally pre-filled with an amount (am=)."""
+    upi_url = f"upi://pay?pa={UPI_ID}&pn={UPI_PAYEE_NAME}"
+    if amount is not None:
+        upi_url += f"&am={Decimal(amount):.2f}&cu=INR"
+    return upi_url
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def qr_code_base64(payload):
+    """PNG QR code for a payload, base64 encoded for embedding in the bill template."""
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    qr_img = qr.make_image(fill_color="black", back_color="white")
+
+    # Save QR code image to BytesIO buffer and convert it to base64
+    qr_buffer = BytesIO()
+    qr_img.save(qr_buffer)
+    return base64.b64encode(qr_buffer.getvalue()).decode('utf-8')
+
+
+def upi_qr_code(amount=None):
+    """Cached base64 QR for the static merchant UPI link or an amount-bearing one."""
+    return qr_code_base64(upi_payment_url(amount))
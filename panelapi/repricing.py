@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .bills import invalidate_bill
+from .models import Order
+from .pricing import price_orders, apply_price
+from .rollups import sales_snapshot, apply_sales_changes
+
+
+# Order fields written by the pricing engine
+REPRICED_FIELDS = [
+    "total_amount",
+    "total_after_discount",
+    "total_gst",
+    "total_cgst",
+    "total_sgst",
+    "total_igst",
+    "total_after_gst",
+]
+
+
+def reprice_orders(orders, chunk_size=1000, dry_run=False):
+    """
+    Recompute the stored totals of every order in a queryset from its items.
+
+    Each chunk is read with one aggregate query and written with one
+    bulk_update. Only orders whose totals actually change are written; their
+    version is bumped so their cached bills are re-rendered, and the daily
+    sales rollup is adjusted by the difference.
+    Returns (checked, repriced).
+    """
+    rows = orders.order_by("pk").annotate(items_total=Sum("order_items__total")).values_list(
+        "pk", "order_number", "version", "items_total", "discount_percentage", "customer__state",
+        "outlet_id", "date_of_billing", "mode_of_payment",
+        *REPRICED_FIELDS,
+    )
+
+    checked = repriced = 0
+    last_pk = 0
+    while True:
+        chunk = list(rows.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1][0]
+        checked += len(chunk)
+
+        prices = price_orders(
+            [row[3] for row in chunk],
+            [row[4] for row in chunk],
+            [row[5] for row in chunk],
+        )
+
+        changed = []
+        sales_changes = []
+        for row, price in zip(chunk, prices):
+            outlet_id, date_of_billing, mode_of_payment = row[6:9]
+            before = Order(outlet_id=outlet_id, date_of_billing=date_of_billing, mode_of_payment=mode_of_payment,
+                           **dict(zip(REPRICED_FIELDS, row[9:])))
+            order = Order(pk=row[0], order_number=row[1], version=row[2], outlet_id=outlet_id,
+                          date_of_billing=date_of_billing, mode_of_payment=mode_of_payment)
+            apply_price(order, price)
+
+            if any(getattr(order, field) != getattr(before, field) for field in REPRICED_FIELDS):
+                changed.append(order)
+                # Item counts do not change, only the amounts
+                sales_changes.append((sales_snapshot(before, 0), sales_snapshot(order, 0)))
+
+        repriced += len(changed)
+        if dry_run or not changed:
+            continue
+
+        with transaction.atomic():
+            # bulk_update skips post_save, so invalidate the cached bills here
+            for order in changed:
+                order.version += 1
+                invalidate_bill(order)
+                order.version = F("version") + 1  # concurrent edits keep their own bump
+
+            Order.objects.bulk_update(changed, REPRICED_FIELDS + ["version"], batch_size=chunk_size)
+
+            # Keep the daily sales rollup in step: one UPDATE per (outlet, date, mode) touched
+            apply_sales_changes(sales_changes)
+
+    return checked, repriced
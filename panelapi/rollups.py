@@ -0,0 +1,189 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction, IntegrityError
+from django.db.models import F, Count, Sum
+from django.utils.timezone import localdate
+
+from .models import Order, OrderItem, DailyOutletSales
+
+
+# Additive measures of a DailyOutletSales row
+SALES_MEASURES = ["order_count", "item_count", "gross", "discount", "cgst", "sgst", "igst"]
+
+
+def _amount(value):
+    return Decimal(value or 0)
+
+
+def sales_snapshot(order, item_count):
+    """
+    What an order contributes to its rollup row, as ((outlet_id, date, mode), measures).
+    Take one before editing an order and one after, then call apply_sales_change.
+    """
+    key = (order.outlet_id, order.date_of_billing, order.mode_of_payment)
+    total_amount = _amount(order.total_amount)
+    return key, {
+        "order_count": 1,
+        "item_count": int(item_count),
+        "gross": total_amount,
+        "discount": total_amount - _amount(order.total_after_discount),
+        "cgst": _amount(order.total_cgst),
+        "sgst": _amount(order.total_sgst),
+        "igst": _amount(order.total_igst),
+    }
+
+
+def _add_to_rollup(key, delta):
+    """Add a delta to one rollup row with a single UPDATE, creating the row if it is missing."""
+    if not any(delta.values()):
+        return
+
+    outlet_id, sales_date, mode = key
+    rows = DailyOutletSales.objects.filter(outlet_id=outlet_id, date=sales_date, mode_of_payment=mode)
+    increments = {measure: F(measure) + value for measure, value in delta.items()}
+
+    if rows.update(**increments):
+        return
+
+    try:
+        with transaction.atomic():
+            DailyOutletSales.objects.create(outlet_id=outlet_id, date=sales_date, mode_of_payment=mode, **delta)
+    except IntegrityError:
+        # A concurrent order created the row first
+        rows.update(**increments)
+
+
+def apply_sales_changes(changes):
+    """
+    Move orders' contributions in the rollup, given (before, after) snapshot
+    pairs (either may be None for a new or removed order). Deltas are summed
+    per rollup row first, so a batch costs one UPDATE per row touched. Call it
+    in the transaction that writes the orders so the rollup never drifts.
+    """
+    deltas = defaultdict(lambda: dict.fromkeys(SALES_MEASURES, 0))
+    for before, after in changes:
+        if before:
+            key, measures = before
+            for measure, value in measures.items():
+                deltas[key][measure] -= value
+        if after:
+            key, measures = after
+            for measure, value in measures.items():
+                deltas[key][measure] += value
+
+    for key, delta in deltas.items():
+        _add_to_rollup(key, delta)
+
+
+def apply_sales_change(before=None, after=None):
+    """Move one order's contribution in the rollup from `before` to `after`."""
+    apply_sales_changes([(before, after)])
+
+
+def record_order_sales(order, order_items):
+    """Add a newly placed order to its rollup row."""
+    apply_sales_change(after=sales_snapshot(order, sum(item.quantity for item in order_items)))
+
+
+# ==============================
+# Rebuild
+# ==============================
+
+def rebuild_daily_sales(outlet_id=None, start_date=None, end_date=None):
+    """
+    Recompute rollup rows from the orders with two aggregate queries and
+    replace the existing rows in the same range. Returns the number of rows written.
+    """
+    orders = Order.objects.all()
+    if outlet_id:
+        orders = orders.filter(outlet_id=outlet_id)
+    if start_date:
+        orders = orders.filter(date_of_billing__gte=start_date)
+    if end_date:
+        orders = orders.filter(date_of_billing__lte=end_date)
+
+    group = ("outlet_id", "date_of_billing", "mode_of_payment")
+    order_totals = orders.values(*group).annotate(
+        order_count=Count("id"),
+        gross=Sum("total_amount"),
+        discount=Sum(F("total_amount") - F("total_after_discount")),
+        cgst=Sum("total_cgst"),
+        sgst=Sum("total_sgst"),
+        igst=Sum("total_igst"),
+    ).order_by()
+    item_counts = {
+        (row["order__outlet_id"], row["order__date_of_billing"], row["order__mode_of_payment"]): row["item_count"]
+        for row in OrderItem.objects.filter(order__in=orders).values(
+            "order__outlet_id", "order__date_of_billing", "order__mode_of_payment"
+        ).annotate(item_count=Sum("quantity")).order_by()
+    }
+
+    rollups = [
+        DailyOutletSales(
+            outlet_id=row["outlet_id"],
+            date=row["date_of_billing"],
+            mode_of_payment=row["mode_of_payment"],
+            order_count=row["order_count"],
+            item_count=item_counts.get((row["outlet_id"], row["date_of_billing"], row["mode_of_payment"])) or 0,
+            gross=_amount(row["gross"]),
+            discount=_amount(row["discount"]),
+            cgst=_amount(row["cgst"]),
+            sgst=_amount(row["sgst"]),
+            igst=_amount(row["igst"]),
+        )
+        for row in order_totals
+    ]
+
+    stale = DailyOutletSales.objects.all()
+    if outlet_id:
+        stale = stale.filter(outlet_id=outlet_id)
+    if start_date:
+        stale = stale.filter(date__gte=start_date)
+    if end_date:
+        stale = stale.filter(date__lte=end_date)
+
+    with transaction.atomic():
+        stale.delete()
+        DailyOutletSales.objects.bulk_create(rollups, batch_size=1000)
+
+    return len(rollups)
+
+
+# ==============================
+# Dashboard
+# ==============================
+
+def _empty_totals():
+    return {"order_count": 0, "item_count": 0, "gross": Decimal("0.00"), "discount": Decimal("0.00"),
+            "net": Decimal("0.00"), "cgst": Decimal("0.00"), "sgst": Decimal("0.00"), "igst": Decimal("0.00")}
+
+
+def sales_dashboard(outlet_id=None, today=None):
+    """
+    Today / this week (from Monday) / this month totals per outlet, read from
+    the rollup table in a single query.
+    """
+    today = today or localdate()
+    periods = {
+        "today": today,
+        "week": today - timedelta(days=today.weekday()),
+        "month": today.replace(day=1),
+    }
+
+    rows = DailyOutletSales.objects.filter(date__gte=min(periods.values()), date__lte=today)
+    if outlet_id:
+        rows = rows.filter(outlet_id=outlet_id)
+
+    dashboard = defaultdict(lambda: {period: _empty_totals() for period in periods})
+    for row in rows.values("outlet_id", "date", *SALES_MEASURES).iterator():
+        for period, start in periods.items():
+            if row["date"] < start:
+                continue
+            totals = dashboard[row["outlet_id"]][period]
+            for measure in SALES_MEASURES:
+                totals[measure] += row[measure]
+            totals["net"] += row["gross"] - row["discount"]
+
+    return [{"outlet_id": outlet, **totals} for outlet, totals in sorted(dashboard.items())]
@@ -0,0 +1,271 @@
+import re
+import unicodedata
+
+from functools import reduce
+from operator import add
+
+from django.db import transaction
+from django.db.models import Q, Exists, OuterRef, Max, Case, When, IntegerField
+
+from .models import Customer, CustomerSearchToken, Product, ProductSearchToken
+
+
+# Results a search can return in total, across all its pages
+SEARCH_MAX_RESULTS = 200
+SEARCH_DEFAULT_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+
+# Query words beyond this are ignored; words shorter than the minimum are too broad to index-scan
+SEARCH_MAX_TERMS = 4
+SEARCH_MIN_TERM_LENGTH = 2
+
+# Shortest phone suffix indexed, so "3210" finds 9876543210 like a substring match did
+PHONE_MIN_SUFFIX = 3
+
+TOKEN_MAX_LENGTH = 64
+TOKEN_BATCH_SIZE = 2000
+
+# Products a product search returns at most
+PRODUCT_SEARCH_DEFAULT_LIMIT = 20
+PRODUCT_SEARCH_MAX_LIMIT = 50
+
+
+class InvalidSearchRequest(Exception):
+    """Raised when the search query or paging parameters are unusable."""
+
+
+def _words(text):
+    """
+    Casefolded words of a text: runs of Unicode letters and digits (\\w
+    without the underscore), keeping combining marks such as Devanagari
+    vowel signs or decomposed accents attached to the letter they follow.
+    """
+    text = unicodedata.normalize("NFC", text or "").casefold()
+    words, start = [], None
+    for i, char in enumerate(text):
+        if char.isalnum() or (start is not None and unicodedata.category(char).startswith("M")):
+            if start is None:
+                start = i
+        elif start is not None:
+            words.append(text[start:i])
+            start = None
+    if start is not None:
+        words.append(text[start:])
+    return words
+
+
+def customer_tokens(name, phone_number):
+    """Index tokens for a customer: the words of the name and the suffixes of the phone number."""
+    tokens = {word[:TOKEN_MAX_LENGTH] for word in _words(name)}
+    digits = re.sub(r"\D", "", phone_number or "")
+    tokens.update(digits[i:] for i in range(len(digits) - PHONE_MIN_SUFFIX + 1))
+    return tokens
+
+
+def product_tokens(item_name, category_name, hsn_sac_code):
+    """Index tokens for a product: the words of its name and category, and its HSN/SAC code."""
+    return {word[:TOKEN_MAX_LENGTH] for word in _words(f"{item_name} {category_name or ''} {hsn_sac_code or ''}")}
+
+
+def search_terms(query):
+    terms = [word for word in _words(query) if len(word) >= SEARCH_MIN_TERM_LENGTH]
+    # Keep the order of first appearance so the annotations are stable
+    return list(dict.fromkeys(terms))[:SEARCH_MAX_TERMS]
+
+
+def _prefix(term):
+    # Every token starting with `term` sorts between it and term + the highest code point: an index range scan
+    return Q(token__gte=term, token__lt=term + "\U0010ffff")
+
+
+# ==============================
+# Index maintenance
+# ==============================
+
+def index_customer(customer):
+    """Replace a customer's search tokens. Called from the Customer post_save signal."""
+    CustomerSearchToken.objects.filter(customer_id=customer.pk).delete()
+    CustomerSearchToken.objects.bulk_create([
+        CustomerSearchToken(customer_id=customer.pk, outlet_id=customer.outlet_id, token=token)
+        for token in customer_tokens(customer.name, customer.phone_number)
+    ])
+
+
+def _insert_tokens(model, tokens):
+    """
+    Bulk insert unsaved token instances from an iterable, TOKEN_BATCH_SIZE
+    at a time, so a full rebuild never holds every token in memory.
+    """
+    batch = []
+    for token in tokens:
+        batch.append(token)
+        if len(batch) >= TOKEN_BATCH_SIZE:
+            model.objects.bulk_create(batch, batch_size=TOKEN_BATCH_SIZE)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch, batch_size=TOKEN_BATCH_SIZE)
+
+
+def _customer_token_rows(customers):
+    for customer_id, outlet_id, name, phone_number in customers:
+        for token in customer_tokens(name, phone_number):
+            yield CustomerSearchToken(customer_id=customer_id, outlet_id=outlet_id, token=token)
+
+
+def index_customers(customer_ids):
+    """Replace the search tokens of many customers at once, for writes that bypass save()."""
+    CustomerSearchToken.objects.filter(customer_id__in=customer_ids).delete()
+    _insert_tokens(CustomerSearchToken, _customer_token_rows(
+        Customer.objects.filter(id__in=customer_ids).values_list("id", "outlet_id", "name", "phone_number")
+    ))
+
+
+def rebuild_customer_search_index(outlet_id=None):
+    """Rebuild the search tokens of all customers (or one outlet's). Returns the number of customers indexed."""
+    customers = Customer.objects.all()
+    tokens = CustomerSearchToken.objects.all()
+    if outlet_id:
+        customers = customers.filter(outlet_id=outlet_id)
+        tokens = tokens.filter(outlet_id=outlet_id)
+
+    with transaction.atomic():
+        tokens.delete()
+        _insert_tokens(CustomerSearchToken, _customer_token_rows(
+            customers.values_list("id", "outlet_id", "name", "phone_number").iterator(chunk_size=TOKEN_BATCH_SIZE)
+        ))
+
+    return customers.count()
+
+
+def _product_token_rows(products):
+    for product_id, item_name, category_name, hsn_sac_code in products:
+        for token in product_tokens(item_name, category_name, hsn_sac_code):
+            yield ProductSearchToken(product_id=product_id, token=token)
+
+
+def index_products(product_ids):
+    """Replace the search tokens of products. Called from the Product and Category signals and bulk imports."""
+    ProductSearchToken.objects.filter(product_id__in=product_ids).delete()
+    _insert_tokens(ProductSearchToken, _product_token_rows(
+        Product.objects.filter(id__in=product_ids).values_list("id", "item_name", "category__name", "hsn_sac_code")
+    ))
+
+
+def rebuild_product_search_index():
+    """Rebuild the search tokens of every product. Returns the number of products indexed."""
+    products = Product.objects.values_list("id", "item_name", "category__name", "hsn_sac_code")
+    with transaction.atomic():
+        ProductSearchToken.objects.all().delete()
+        _insert_tokens(ProductSearchToken, _product_token_rows(
+            products.iterator(chunk_size=TOKEN_BATCH_SIZE)
+        ))
+    return Product.objects.count()
+
+
+# ==============================
+# Search
+# ==============================
+
+def _ranked_ids(model, owner, scope, query, limit):
+    """
+    Ids of the token owners (customers or products) that match every query
+    word as a token prefix, best first: more whole-word matches rank higher.
+
+    The longest word drives an index range scan of the tokens, narrowed by
+    `scope` (a filter on the driving rows); the other words are checked per
+    candidate against its handful of tokens. Returns (id, exact_matches) pairs.
+    """
+    terms = sorted(search_terms(query), key=len, reverse=True)
+    if not terms:
+        raise InvalidSearchRequest(f"Search needs at least one word of {SEARCH_MIN_TERM_LENGTH} or more letters or digits.")
+
+    def has_token(condition):
+        return Exists(model.objects.filter(condition, **{owner: OuterRef(owner)}))
+
+    rows = model.objects.filter(_prefix(terms[0]), scope)
+    for term in terms[1:]:
+        rows = rows.filter(has_token(_prefix(term)))
+
+    # Whole-word matches: the driving word is read off the scanned rows, the others per candidate
+    exact = reduce(add, [
+        Max(Case(When(token=terms[0], then=1), default=0, output_field=IntegerField())),
+        *[Case(When(has_token(Q(token=term)), then=1), default=0, output_field=IntegerField()) for term in terms[1:]],
+    ])
+    return rows.values(owner).annotate(exact=exact).values_list(owner, "exact").order_by("-exact", f"-{owner}")[:limit]
+
+
+def ranked_customer_ids(outlet_id, query, limit=SEARCH_MAX_RESULTS):
+    """
+    Ids of the outlet's customers matching every query word, best first:
+    more whole-word (or whole-number) matches, then the most recently added.
+    """
+    return [customer_id for customer_id, _ in _ranked_ids(
+        CustomerSearchToken, "customer_id", Q(outlet_id=outlet_id), query, limit
+    )]
+
+
+def parse_search_page(query_params):
+    """(page, page_size) from the query string, 1-based page."""
+    try:
+        page = int(query_params.get("page", 1))
+        page_size = int(query_params.get("page_size", SEARCH_DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise InvalidSearchRequest("page and page_size must be integers.")
+    if page < 1 or not 1 <= page_size <= SEARCH_MAX_PAGE_SIZE:
+        raise InvalidSearchRequest(f"page must be 1 or more and page_size between 1 and {SEARCH_MAX_PAGE_SIZE}.")
+    return page, page_size
+
+
+def search_customers(outlet_id, query, page=1, page_size=SEARCH_DEFAULT_PAGE_SIZE):
+    """
+    One page of ranked typeahead results: (customers, total), where total is
+    the number of matches capped at SEARCH_MAX_RESULTS. Two queries.
+    """
+    customer_ids = ranked_customer_ids(outlet_id, query)
+    page_ids = customer_ids[(page - 1) * page_size:page * page_size]
+
+    customers = {
+        customer["id"]: customer
+        for customer in Customer.objects.filter(id__in=page_ids).values(
+            "id", "name", "phone_number", "state", "gst_number", "address"
+        )
+    } if page_ids else {}
+
+    return [customers[customer_id] for customer_id in page_ids if customer_id in customers], len(customer_ids)
+
+
+def parse_product_search_limit(query_params):
+    try:
+        limit = int(query_params.get("limit", PRODUCT_SEARCH_DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        raise InvalidSearchRequest("limit must be an integer.")
+    if not 1 <= limit <= PRODUCT_SEARCH_MAX_LIMIT:
+        raise InvalidSearchRequest(f"limit must be between 1 and {PRODUCT_SEARCH_MAX_LIMIT}.")
+    return limit
+
+
+def search_products(outlet_id, query, limit=PRODUCT_SEARCH_DEFAULT_LIMIT):
+    """
+    Products in an outlet's catalog matching a typeahead query ("sar" finds
+    Saree), by name, category or HSN/SAC code. Whole-word matches come
+    first, then the newest products; the page is listed by name within
+    each rank. Two queries.
+    """
+    # Scope the scan to the outlet's catalog through the product-outlet table
+    in_catalog = Exists(Product.outlets.through.objects.filter(product_id=OuterRef("product_id"), outlet_id=outlet_id))
+    ranked = dict(_ranked_ids(ProductSearchToken, "product_id", in_catalog, query, limit))
+
+    products = Product.objects.filter(id__in=ranked).values(
+        "id", "item_name", "rate_per_unit", "hsn_sac_code", "category__name"
+    )
+    products = sorted(products, key=lambda product: (-ranked[product["id"]], product["item_name"].lower()))
+    return [
+        {
+            "id": product["id"],
+            "item_name": product["item_name"],
+            "rate_per_unit": product["rate_per_unit"],
+            "hsn_sac_code": product["hsn_sac_code"],
+            "category": product["category__name"],
+        }
+        for product in products
+    ]
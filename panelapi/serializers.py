@@ -98,6 +98,11 @@ class OrderSerializer(serializers.ModelSerializer):
     customer = CustomerSerializer()
     order_items = OrderItemSerializer(many=True, write_only=True)
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Join the nested customer into the order query (order_items is write-only)."""
+        return queryset.select_related('customer')
+
     class Meta:
         model = Order
         fields = [
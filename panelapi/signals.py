@@ -0,0 +1,161 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.db import transaction
+from django.db.models import QuerySet
+from django.dispatch import receiver
+
+from .bills import invalidate_bill, bump_bill_version
+from .catalog import invalidate_catalog
+from .changelog import sync_key, record_deletions, touch_products
+from .customers import invalidate_customer
+from .search import index_customer, index_products
+from .specifications import specification_cache, specification_signature
+from .models import Order, OrderItem, OrderItemSpecification, Outlet, Product, Category, Customer
+
+
+# ==============================
+# Rendered bill invalidation
+# ==============================
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def invalidate_order_bill(sender, instance, **kwargs):
+    invalidate_bill(instance)
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def invalidate_order_item_bill(sender, instance, origin=None, **kwargs):
+    # Items deleted along with their order (or outlet): the order's own post_delete drops the bill
+    deleted = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if deleted in (Order, Outlet):
+        return
+    # A new version, so a render of the old items already in flight cannot overwrite the tombstone
+    bump_bill_version(Order(pk=instance.order_id))
+
+
+# ==============================
+# Catalog snapshot invalidation
+# ==============================
+
+# Covers add_product, edit_product, delete_product and the specification
+# list/create views; the bulk product import invalidates on its own
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_catalog_snapshots(sender, **kwargs):
+    # Receives every model's writes; only the tables counters sync feed the snapshots
+    if sync_key(sender):
+        invalidate_catalog()
+
+
+@receiver(m2m_changed, sender=Product.outlets.through)
+def invalidate_catalog_outlets(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_catalog()
+
+
+# ==============================
+# Customer lookup cache invalidation
+# ==============================
+
+# Covers add_customer, edit_customer and the get_or_create in place_order
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_customer_lookup(sender, instance, **kwargs):
+    invalidate_customer(instance)
+
+
+# ==============================
+# Customer search index
+# ==============================
+
+@receiver(post_save, sender=Customer)
+def index_customer_search_tokens(sender, instance, raw=False, **kwargs):
+    # Tokens go with the customer on delete (cascade); fixtures are indexed by the rebuild command
+    if not raw:
+        index_customer(instance)
+
+
+# ==============================
+# Product search index
+# ==============================
+
+@receiver(post_save, sender=Product)
+def index_product_search_tokens(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_products([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def index_category_product_tokens(sender, instance, raw=False, **kwargs):
+    # Category names are indexed on their products
+    if not raw:
+        index_products(list(instance.products.values_list('pk', flat=True)))
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_products(sender, instance, **kwargs):
+    # The products are detached (SET_NULL) without signals; reindex them once the category is gone
+    instance._search_products = list(instance.products.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def reindex_category_products(sender, instance, **kwargs):
+    index_products(getattr(instance, '_search_products', []))
+
+
+# ==============================
+# Specification interning
+# ==============================
+
+# Orders intern specifications in bulk; this keeps single saves (admin) consistent
+@receiver(pre_save, sender=OrderItemSpecification)
+def sign_specification(sender, instance, **kwargs):
+    instance.signature = specification_signature(instance)
+
+
+@receiver(post_delete, sender=OrderItemSpecification)
+def forget_specification(sender, instance, **kwargs):
+    if instance.signature:
+        transaction.on_commit(lambda: specification_cache.discard(instance.signature))
+
+
+# ==============================
+# Counter sync change tracking
+# ==============================
+
+@receiver(post_delete)
+def record_sync_deletion(sender, instance, **kwargs):
+    # Receives every model's deletes; only the catalog and master-data tables are tracked
+    key = sync_key(sender)
+    if key:
+        record_deletions(key, [instance.pk])
+
+
+@receiver(m2m_changed, sender=Product.outlets.through)
+def track_product_outlets(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        # pk_set is not provided for clear(); remember what is about to be removed
+        if reverse:
+            instance._sync_cleared = list(instance.products.values_list('pk', flat=True))
+        else:
+            instance._sync_cleared = list(instance.outlets.values_list('pk', flat=True))
+        return
+
+    if action == "post_clear":
+        pk_set = getattr(instance, '_sync_cleared', [])
+    elif action not in ("post_add", "post_remove"):
+        return
+
+    if not pk_set:
+        return
+
+    if action == "post_add":
+        # Newly assigned products show up as changed in the outlet's next sync
+        touch_products(pk_set if reverse else [instance.pk])
+    elif reverse:
+        # outlet.products.remove(...): pk_set holds product ids
+        record_deletions("products", pk_set, outlet_id=instance.pk)
+    else:
+        # product.outlets.remove(...): pk_set holds outlet ids
+        for outlet_id in pk_set:
+            record_deletions("products", [instance.pk], outlet_id=outlet_id)
@@ -0,0 +1,195 @@
+import hashlib
+import threading
+
+from collections import OrderedDict
+
+from django.db import transaction
+from django.db.models import Case, When, Value
+
+from .models import OrderItem, OrderItemSpecification
+
+
+# Columns that make up a specification, in signature order
+SPECIFICATION_LOOKUP_FIELDS = [
+    "brand",
+    "pattern",
+    "stain_type",
+    "defect_type",
+    "material_type",
+    "starch_type",
+    "detergent_type",
+    "detergent_scent_type",
+    "wash_temperature_type",
+    "fabric_softener_type",
+    "colour",
+    "top_up_service",
+]
+SPECIFICATION_FLAG_FIELDS = ["box", "fold"]
+
+# Distinct specifications remembered per worker process; least-recently-used are evicted first
+SPECIFICATION_CACHE_SIZE = 50000
+
+# Rows read, repointed and deleted per statement by deduplicate_specifications
+SPECIFICATION_DEDUP_BATCH_SIZE = 500
+
+
+def specification_signature(spec):
+    """
+    Canonical hash of a specification: the twelve lookup ids and the box /
+    fold flags. Takes an OrderItemSpecification (saved or not) or a dict of
+    the same `<lookup>_id` / flag values.
+    """
+    get = spec.get if isinstance(spec, dict) else lambda name: getattr(spec, name)
+    parts = [f"{field}={get(f'{field}_id') or ''}" for field in SPECIFICATION_LOOKUP_FIELDS]
+    parts += [f"{field}={int(bool(get(field)))}" for field in SPECIFICATION_FLAG_FIELDS]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+class SpecificationCache:
+    """
+    Thread-safe LRU map of specification signature -> row id. Interned rows
+    are never edited or deleted (the admin is read-only for them), so an
+    entry stays valid for the life of the process.
+    """
+
+    def __init__(self, max_size=SPECIFICATION_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._ids = OrderedDict()
+
+    def get_many(self, signatures):
+        found = {}
+        with self._lock:
+            for signature in signatures:
+                spec_id = self._ids.get(signature)
+                if spec_id is not None:
+                    self._ids.move_to_end(signature)
+                    found[signature] = spec_id
+        return found
+
+    def set_many(self, ids):
+        with self._lock:
+            for signature, spec_id in ids.items():
+                self._ids[signature] = spec_id
+                self._ids.move_to_end(signature)
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+
+    def discard(self, signature):
+        with self._lock:
+            self._ids.pop(signature, None)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+
+specification_cache = SpecificationCache()
+
+
+# ==============================
+# Interning
+# ==============================
+
+def intern_specifications(specifications):
+    """
+    Give unsaved OrderItemSpecification instances the id of the existing
+    row with the same signature, inserting only the combinations never seen
+    before. Cached signatures cost no query; the rest take one select and,
+    for new combinations, one insert and one more select.
+    """
+    for spec in specifications:
+        spec.signature = specification_signature(spec)
+    signatures = {spec.signature for spec in specifications}
+
+    ids = specification_cache.get_many(signatures)
+    missing = signatures - ids.keys()
+    if missing:
+        ids.update(OrderItemSpecification.objects.filter(signature__in=missing).values_list("signature", "id"))
+        new = {spec.signature: spec for spec in specifications if spec.signature not in ids}
+        if new:
+            # ignore_conflicts: an order placed concurrently may insert the same combination first
+            OrderItemSpecification.objects.bulk_create(new.values(), ignore_conflicts=True)
+            ids.update(OrderItemSpecification.objects.filter(signature__in=new).values_list("signature", "id"))
+
+        # Only remember ids once they are committed; a rolled-back order may have inserted them
+        resolved = {signature: ids[signature] for signature in missing}
+        transaction.on_commit(lambda: specification_cache.set_many(resolved))
+
+    for spec in specifications:
+        spec.pk = ids[spec.signature]
+        spec._state.adding = False
+    return specifications
+
+
+# ==============================
+# Deduplication
+# ==============================
+
+def _specification_rows():
+    """Every specification row as a dict, in id order, read a batch at a time by keyset."""
+    fields = ["id", "signature", *[f"{field}_id" for field in SPECIFICATION_LOOKUP_FIELDS], *SPECIFICATION_FLAG_FIELDS]
+    last_id = 0
+    while True:
+        rows = list(OrderItemSpecification.objects.filter(id__gt=last_id).order_by("id").values(*fields)[:SPECIFICATION_DEDUP_BATCH_SIZE])
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1]["id"]
+
+
+def _merge_duplicates(duplicates):
+    """Repoint order items from duplicate rows ({duplicate_id: kept_id}) in one update, then delete the duplicates."""
+    OrderItem.objects.filter(specification_id__in=duplicates).update(specification_id=Case(
+        *[When(specification_id=duplicate_id, then=Value(kept_id)) for duplicate_id, kept_id in duplicates.items()]
+    ))
+    OrderItemSpecification.objects.filter(id__in=duplicates).delete()
+
+
+def deduplicate_specifications():
+    """
+    Collapse specification rows with identical content into one, repoint
+    their order items at it and (re)compute every row's signature. Safe to
+    run again, e.g. after lookup rows were deleted and their references
+    nulled. Returns (rows_kept, rows_removed).
+
+    The row already holding a signature is kept, so ids cached by running
+    workers stay valid; otherwise the oldest row is.
+    """
+    with transaction.atomic():
+        # Rows whose stored signature still matches their content keep it
+        kept = {}
+        for row in _specification_rows():
+            signature = specification_signature(row)
+            if row["signature"] == signature:
+                kept[signature] = row["id"]
+
+        duplicates, resign, removed = {}, {}, 0
+        for row in _specification_rows():
+            signature = specification_signature(row)
+            kept_id = kept.setdefault(signature, row["id"])
+            if kept_id != row["id"]:
+                duplicates[row["id"]] = kept_id
+            elif row["signature"] != signature:
+                resign[row["id"]] = signature
+
+            if len(duplicates) >= SPECIFICATION_DEDUP_BATCH_SIZE:
+                _merge_duplicates(duplicates)
+                removed += len(duplicates)
+                duplicates = {}
+
+        if duplicates:
+            _merge_duplicates(duplicates)
+            removed += len(duplicates)
+
+        # Clear first so a stale signature still held by another kept row cannot collide
+        spec_ids = list(resign)
+        for start in range(0, len(spec_ids), SPECIFICATION_DEDUP_BATCH_SIZE):
+            OrderItemSpecification.objects.filter(id__in=spec_ids[start:start + SPECIFICATION_DEDUP_BATCH_SIZE]).update(signature=None)
+        OrderItemSpecification.objects.bulk_update(
+            [OrderItemSpecification(id=spec_id, signature=signature) for spec_id, signature in resign.items()],
+            ["signature"],
+            batch_size=SPECIFICATION_DEDUP_BATCH_SIZE,
+        )
+
+    return len(kept), removed
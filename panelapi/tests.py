@@ -1,3 +1,356 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+
+from decimal import Decimal
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils.timezone import now
+
+from .jobs import (
+    JOB_HANDLERS,
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JobLost,
+    claim_next_job,
+    enqueue_job,
+    run_job,
+    save_checkpoint,
+)
+from .models import Order, OrderItem, Customer, Outlet, Category, Product, Brand, Colour, OrderItemSpecification, Job
+from .pricing import price_order
+from .search import search_customers, search_terms
+from .specifications import specification_cache, intern_specifications, deduplicate_specifications
+
 
 # Create your tests here.
+@unittest.skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite specific")
+class HotQueryIndexTests(TestCase):
+    """
+    The hot lookup paths must be served from an index. Fails when a schema
+    change makes SQLite fall back to a full table scan or a sort.
+    """
+
+    def assertUsesIndex(self, queryset, index_name=None):
+        plan = queryset.explain()
+        self.assertIn("USING", plan, plan)
+        self.assertNotRegex(plan, r"\bSCAN panelapi_", plan)
+        self.assertNotIn("TEMP B-TREE", plan, plan)  # ORDER BY must come from the index too
+        if index_name:
+            self.assertIn(index_name, plan, plan)
+
+    def test_order_listing_by_outlet_and_billing_date(self):
+        orders = Order.objects.filter(
+            outlet_id=1, date_of_billing__gte="2025-01-01", date_of_billing__lte="2025-01-31"
+        ).order_by("-date_of_billing", "-id")[:101]
+        self.assertUsesIndex(orders, "order_outlet_billing_idx")
+
+    def test_order_listing_next_page(self):
+        cursor_date = date(2025, 1, 15)
+        orders = Order.objects.filter(outlet_id=1).filter(
+            Q(date_of_billing__lt=cursor_date) | Q(date_of_billing=cursor_date, id__lt=500)
+        ).order_by("-date_of_billing", "-id")[:101]
+        self.assertUsesIndex(orders, "order_outlet_billing_idx")
+
+    def test_invoice_number_prefix_by_outlet(self):
+        invoice_numbers = Order.objects.filter(
+            outlet_id=1, invoice_number__startswith="1LT1025"
+        ).values_list("invoice_number", flat=True)
+        self.assertUsesIndex(invoice_numbers, "order_outlet_invoice_idx")
+
+    def test_customer_by_outlet_and_phone(self):
+        # phone_number is unique; SQLite names the index backing that constraint
+        self.assertUsesIndex(
+            Customer.objects.filter(outlet_id=1, phone_number="9876543210"), "sqlite_autoindex_panelapi_customer_1"
+        )
+
+    def test_order_items_by_order(self):
+        self.assertUsesIndex(OrderItem.objects.filter(order_id=1))
+
+
+class SpecificationInterningTests(TestCase):
+    """Order items with the same specs share one OrderItemSpecification row."""
+
+    def setUp(self):
+        specification_cache.clear()
+        self.brand = Brand.objects.create(name="Raymond")
+        self.colour = Colour.objects.create(name="Blue")
+
+    def tearDown(self):
+        specification_cache.clear()
+
+    def spec(self, **fields):
+        return OrderItemSpecification(**{"brand": self.brand, "colour": self.colour, "fold": True, **fields})
+
+    def test_identical_specs_share_a_row(self):
+        first = intern_specifications([self.spec(), self.spec(), self.spec(fold=False)])
+        second = intern_specifications([self.spec(fold=False), self.spec()])
+
+        self.assertEqual(OrderItemSpecification.objects.count(), 2)
+        self.assertEqual(first[0].pk, first[1].pk)
+        self.assertNotEqual(first[0].pk, first[2].pk)
+        self.assertEqual([spec.pk for spec in second], [first[2].pk, first[0].pk])
+
+    def test_cached_specs_cost_no_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            spec_id = intern_specifications([self.spec()])[0].pk
+
+        with self.assertNumQueries(0):
+            self.assertEqual(intern_specifications([self.spec()])[0].pk, spec_id)
+
+    def test_rolled_back_ids_are_not_cached(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    signature = intern_specifications([self.spec()])[0].signature
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertEqual(specification_cache.get_many([signature]), {})
+        self.assertFalse(OrderItemSpecification.objects.exists())
+
+
+class SpecificationDeduplicationTests(TestCase):
+    """deduplicate_specifications merges identical rows and repoints their order items."""
+
+    def setUp(self):
+        specification_cache.clear()
+        outlet = Outlet.objects.create(
+            owner_name="Owner", company_owned="Laundry Talks", location="Noida", address="Sector 18", owner_details="-",
+        )
+        category = Category.objects.create(name="Wash & Iron")
+        self.product = Product.objects.create(item_name="Shirt", rate_per_unit=Decimal("50.00"), category=category)
+        self.order = Order.objects.create(order_number="ORDER1", outlet=outlet, invoice_number="1LT10251", total_amount=0)
+        self.brand = Brand.objects.create(name="Raymond")
+        self.colour = Colour.objects.create(name="Blue")
+
+    def add_items(self, specs):
+        OrderItem.objects.bulk_create([
+            OrderItem(order=self.order, product=self.product, quantity=1, total=Decimal("50.00"), specification=spec)
+            for spec in specs
+        ])
+
+    def test_merges_legacy_rows(self):
+        # One unsigned row per item, as orders wrote them before interning
+        legacy = OrderItemSpecification.objects.bulk_create(
+            [OrderItemSpecification(brand=self.brand, fold=True) for _ in range(3)]
+            + [OrderItemSpecification(brand=self.brand)]
+        )
+        self.add_items(legacy)
+
+        self.assertEqual(deduplicate_specifications(), (2, 2))
+
+        self.assertEqual(
+            sorted(OrderItem.objects.values_list("specification_id", flat=True)),
+            [legacy[0].pk] * 3 + [legacy[3].pk],
+        )
+        self.assertFalse(OrderItemSpecification.objects.filter(signature__isnull=True).exists())
+        # Orders placed afterwards reuse the merged rows
+        self.assertEqual(intern_specifications([OrderItemSpecification(brand=self.brand, fold=True)])[0].pk, legacy[0].pk)
+        self.assertEqual(deduplicate_specifications(), (2, 0))
+
+    def test_merges_rows_made_identical_by_a_deleted_lookup(self):
+        specs = intern_specifications([
+            OrderItemSpecification(brand=self.brand),
+            OrderItemSpecification(brand=self.brand, colour=self.colour),
+        ])
+        self.add_items(specs)
+
+        # SET_NULL leaves the second row with the first row's content but its old signature
+        self.colour.delete()
+        self.assertEqual(deduplicate_specifications(), (1, 1))
+
+        self.assertEqual(set(OrderItem.objects.values_list("specification_id", flat=True)), {specs[0].pk})
+
+
+class SimulatedCrash(BaseException):
+    """Stands in for a worker dying mid-job; run_job does not catch it."""
+
+
+def brand_job(job):
+    """Test handler: one brand per row of params["rows"], one checkpoint per row."""
+    start = (job.checkpoint or {}).get("row", 0)
+    for row in range(start, job.params["rows"]):
+        with transaction.atomic():
+            Brand.objects.create(name=f"Brand {row}")
+            save_checkpoint(job, {"row": row + 1}, row + 1)
+        if row + 1 == job.params.get("crash_after"):
+            raise SimulatedCrash
+    return {"created": Brand.objects.count()}
+
+
+def failing_job(job):
+    raise ValueError("bad input")
+
+
+class JobTestMixin:
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.handlers = mock.patch.dict(JOB_HANDLERS, {"brands": brand_job, "failing": failing_job})
+        self.handlers.start()
+
+    def tearDown(self):
+        self.handlers.stop()
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def expire_lease(self, job):
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=now() - timedelta(seconds=JOB_LEASE_SECONDS + 1))
+
+
+class JobQueueTests(JobTestMixin, TestCase):
+    """Claiming, leases, resuming and giving up on background jobs."""
+
+    def test_claim_is_compare_and_set(self):
+        job = enqueue_job("brands", {"rows": 1})
+
+        self.assertEqual(claim_next_job("worker-1").pk, job.pk)
+        # Running with a live lease: nobody else gets it
+        self.assertIsNone(claim_next_job("worker-2"))
+
+        # A candidate whose owner heartbeats between the read and the claim is not taken
+        self.expire_lease(job)
+
+        def heartbeat_before_claim(*args, **kwargs):
+            if "heartbeat_at" in kwargs:  # the compare-and-set UPDATE
+                Job.objects.all().update(heartbeat_at=now())
+            return Job.objects.all().filter(*args, **kwargs)
+
+        with mock.patch.object(Job.objects, "filter", side_effect=heartbeat_before_claim):
+            self.assertIsNone(claim_next_job("worker-2"))
+        self.assertEqual(Job.objects.get(pk=job.pk).worker, "worker-1")
+
+    def test_resume_from_checkpoint_after_crash(self):
+        job = enqueue_job("brands", {"rows": 5, "crash_after": 3})
+
+        with self.assertRaises(SimulatedCrash):
+            run_job(claim_next_job("worker-1"))
+        self.assertEqual(Brand.objects.count(), 3)
+        self.assertIsNone(claim_next_job("worker-2"))  # lease still held
+
+        self.expire_lease(job)
+        reclaimed = claim_next_job("worker-2")
+        self.assertEqual((reclaimed.pk, reclaimed.attempts, reclaimed.checkpoint), (job.pk, 2, {"row": 3}))
+        run_job(reclaimed)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.processed, 5)
+        self.assertEqual(job.result, {"created": 5})
+        self.assertEqual(Brand.objects.count(), 5)  # no row written twice
+
+    def test_reclaimed_job_is_lost_to_its_first_worker(self):
+        job = enqueue_job("brands", {"rows": 1})
+        first = claim_next_job("worker-1")
+        self.expire_lease(job)
+        claim_next_job("worker-2")
+
+        with self.assertRaises(JobLost):
+            save_checkpoint(first, {"row": 1}, 1)
+
+        # run_job stops quietly and leaves the job to its new worker
+        run_job(first)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), (Job.RUNNING, "worker-2"))
+        self.assertFalse(Brand.objects.exists())
+
+    def test_gives_up_after_max_attempts(self):
+        job = enqueue_job("brands", {"rows": 1}, SimpleUploadedFile("brands.csv", b"name\n"))
+        path = job.file.path
+        for _ in range(JOB_MAX_ATTEMPTS + 1):
+            claimed = claim_next_job("worker-1")
+            self.expire_lease(job)
+        run_job(claimed)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.error, f"Gave up after {JOB_MAX_ATTEMPTS} attempts.")
+        self.assertFalse(job.file)
+        self.assertFalse(Brand.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_failed_job_removes_its_input(self):
+        job = enqueue_job("failing", upload=SimpleUploadedFile("customers.csv", b"name\n"))
+        path = job.file.path
+        run_job(claim_next_job("worker-1"))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (Job.FAILED, "bad input"))
+        self.assertFalse(job.file)
+        self.assertFalse(os.path.exists(path))
+
+
+def slow_job(job):
+    """Test handler: one chunk that outlasts several heartbeats."""
+    started = Job.objects.get(pk=job.pk).heartbeat_at
+    time.sleep(0.5)
+    return {"refreshed": Job.objects.get(pk=job.pk).heartbeat_at > started}
+
+
+class JobHeartbeatTests(JobTestMixin, TransactionTestCase):
+    """The lease is kept alive while a slow chunk runs, not only when chunks commit."""
+
+    def test_heartbeat_refreshes_during_a_slow_chunk(self):
+        with mock.patch.dict(JOB_HANDLERS, {"slow": slow_job}):
+            job = enqueue_job("slow")
+            run_job(claim_next_job("worker-1"), heartbeat_interval=0.1)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), (Job.SUCCEEDED, {"refreshed": True}))
+
+
+class CustomerSearchTokenTests(TestCase):
+    """Search tokens keep non-ASCII names whole, as the icontains search they replaced did."""
+
+    def setUp(self):
+        self.outlet = Outlet.objects.create(
+            owner_name="Owner", company_owned="Laundry Talks", location="Noida", address="Sector 18", owner_details="-",
+        )
+        for name, phone_number in [("José García", "9876500001"), ("राम कुमार", "9876500002"), ("Ravi Kumar", "9876500003")]:
+            Customer.objects.create(name=name, phone_number=phone_number, state="Delhi", outlet=self.outlet)
+
+    def names(self, query):
+        customers, _ = search_customers(self.outlet.id, query)
+        return [customer["name"] for customer in customers]
+
+    def test_terms_keep_accents_and_combining_marks(self):
+        self.assertEqual(search_terms("JOSÉ  garcía"), ["josé", "garcía"])
+        # Decomposed accents and Devanagari vowel signs stay part of their word
+        self.assertEqual(search_terms("Jose\u0301 राम"), ["josé", "राम"])
+
+    def test_finds_non_ascii_names_by_prefix(self):
+        self.assertEqual(self.names("jos"), ["José García"])
+        self.assertEqual(self.names("GARCÍA"), ["José García"])
+        self.assertEqual(self.names("राम"), ["राम कुमार"])
+        self.assertEqual(self.names("कुम"), ["राम कुमार"])
+        self.assertEqual(self.names("kum"), ["Ravi Kumar"])
+
+
+class GstSplitTests(SimpleTestCase):
+    """Intra-state GST is split into equal CGST and SGST halves, whatever the paisa rounding."""
+
+    def test_odd_paisa_gst_splits_equally(self):
+        # 135.00 net: 18% extracted on its own would be 20.59, which has no equal halves
+        price = price_order([Decimal("150.00")], 10, "Uttar Pradesh")
+
+        self.assertEqual(price.total_after_discount, Decimal("135.00"))
+        self.assertEqual((price.total_cgst, price.total_sgst), (Decimal("10.30"), Decimal("10.30")))
+        self.assertEqual(price.total_gst, Decimal("20.60"))
+        self.assertEqual(price.taxable_value + price.total_gst, price.total_after_discount)
+
+    def test_inter_state_gst_is_all_igst(self):
+        price = price_order([Decimal("150.00")], 10, "Delhi")
+
+        self.assertEqual((price.total_cgst, price.total_sgst), (Decimal("0.00"), Decimal("0.00")))
+        self.assertEqual(price.total_igst, Decimal("20.59"))
+        self.assertEqual(price.taxable_value + price.total_gst, price.total_after_discount)
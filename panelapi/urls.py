@@ -29,6 +29,19 @@ urlpatterns = [
     
     # Method to get orders for an outlet
     path('<int:outlet_id>/get-orders/', views.get_orders_by_outlet, name='get_orders_by_outlet'),
+
+    # Method to export an outlet's orders (CSV or xlsx) for a date range
+    path('<int:outlet_id>/orders/export/', views.export_orders, name='export_orders'),
+
+    # Today / this week / this month sales per outlet
+    path('dashboard/sales/', views.sales_dashboard_view, name='sales_dashboard'),
+
+    # Monthly GSTR-1 style report (B2B, B2C, HSN summary)
+    path('<int:outlet_id>/reports/gstr1/', views.gstr1_report_view, name='gstr1_report'),
+
+    # Background jobs (imports, exports, reports)
+    path('jobs/', views.list_jobs, name='list_jobs'),
+    path('jobs/<int:job_id>/', views.job_status_view, name='job_status'),
     
     path('orders/invoice/<str:invoice_number>/', views.get_order_details_by_invoice, name='get-order-by-invoice'),
     
@@ -41,6 +54,8 @@ urlpatterns = [
     path('edit-bill/<int:outlet_id>/<str:order_number>/<int:user_id>/', views.update_order_discount, name='update_order_discount'),
     
     path('<int:outlet_id>/customers/', views.get_customers_by_outlet, name='get_customers_by_outlet'),
+    path('<int:outlet_id>/customers/search/', views.search_customers_view, name='search_customers'),
+    path('<int:outlet_id>/customers/import/', views.import_customers_view, name='import_customers'),
     
     path('customers/<int:customer_id>/edit/', views.edit_customer, name='edit_customer'),
     
@@ -1,20 +1,16 @@
 import random
 import string
-import openpyxl
-import qrcode
-import base64
 
-from io import BytesIO
-from num2words import num2words
 from decimal import Decimal
 
 
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse
 from django.contrib.auth.hashers import make_password
+from django.db import transaction
 from django.db.models import Q
-from django.shortcuts import render
+from django.urls import reverse
 
 
 from drf_yasg.utils import swagger_auto_schema
@@ -37,7 +33,8 @@ from .models import (
     Category,
     Order,
     OrderItem,
-    Customer
+    Customer,
+    Job,
 )
 
 from .serializers import (
@@ -49,6 +46,17 @@ from .serializers import (
     CustomerSerializer,
     CustomerUpdateSerializer
 )
+from .bills import render_bill, get_cached_bill, bump_bill_version
+from .catalog import catalog_response
+from .pricing import price_order, apply_price
+from .repricing import REPRICED_FIELDS
+from .rollups import sales_snapshot, apply_sales_change, sales_dashboard
+from .pagination import InvalidPageRequest, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate_orders
+from .imports import IMPORT_FILE_TYPES
+from .jobs import JOB_LIST_LIMIT, enqueue_job, job_status
+from .search import InvalidSearchRequest, SEARCH_MAX_PAGE_SIZE, parse_search_page, search_customers
+from .gst_reports import InvalidReportPeriod, parse_report_month, gstr1_report, gstr1_xlsx_response
+from .exports import InvalidExportRequest, parse_export_date, export_rows, csv_export_response, xlsx_export_response
 from users.models import CustomUser
 
 
@@ -243,8 +251,11 @@ def get_all_outlets(request):
 @swagger_auto_schema(
     method='post',
     request_body=ProductSerializer,
-    responses={201: 'Products added successfully', 400: 'Bad request', 500: 'Internal server error'},
-    operation_description="Add products from an Excel file."
+    responses={202: 'Import queued; poll status_url for progress and the skipped rows', 400: 'Bad request', 500: 'Internal server error'},
+    operation_description=(
+        "Add products from an Excel (or CSV) price list: item name, rate, HSN/SAC code, category. "
+        "The file is imported by a background job; the response carries its id right away."
+    )
 )
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -278,46 +289,34 @@ def add_products_excel(request, user_id):
         if not excel_file:
             return Response({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Read the Excel file using openpyxl
-        wb = openpyxl.load_workbook(BytesIO(excel_file.read()))
-        sheet = wb.active
-        
         # Retrieve outlet_id from query params
         outlet_id = request.query_params.get('outlet_id', None)
-        outlets = []
 
         if outlet_id:
             # If outlet_id is provided, validate the outlet exists
-            try:
-                outlet = Outlet.objects.get(id=outlet_id)
-                outlets.append(outlet)
-            except Outlet.DoesNotExist:
+            if not Outlet.objects.filter(id=outlet_id).exists():
                 return Response({"error": "Outlet not found"}, status=status.HTTP_400_BAD_REQUEST)
+            outlet_ids = [int(outlet_id)]
         else:
             # If no outlet_id is provided, associate products with all outlets
-            outlets = Outlet.objects.all()
-
-        products_added = []
-        categories = {category.name.lower(): category for category in Category.objects.all()}  # Dictionary for fast category lookup
-
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            item_name, rate_per_unit, hsn_sac_code, category_name = row  # Extract category name from Excel
-            if item_name and rate_per_unit:
-                # Check if category is present and matches
-                category = categories.get(category_name.strip().lower())  # Convert both to lowercase for comparison
-                if not category:
-                    continue  # Skip product if category does not match
-                
-                # Create product for each outlet
-                product = Product.objects.create(item_name=item_name, rate_per_unit=rate_per_unit, hsn_sac_code=hsn_sac_code, category=category)
-                product.outlets.set(outlets)  # Associate product with the selected outlets
-                products_added.append(product)
+            outlet_ids = Outlet.objects.values_list('id', flat=True)
+
+        if not excel_file.name.lower().endswith(IMPORT_FILE_TYPES):
+            return Response({"error": True, "detail": "Upload a .csv or .xlsx file."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The run_jobs worker streams the rows in and inserts them in bulk, chunk by chunk
+        job = enqueue_job("import_products", {"outlet_ids": list(outlet_ids)}, excel_file)
 
         return Response(
-            {"error": False, "detail": f"{len(products_added)} products added successfully"},
-            status=status.HTTP_201_CREATED
+            {
+                "error": False,
+                "detail": "Product import queued",
+                "job_id": job.id,
+                "status_url": reverse('job_status', args=[job.id]),
+            },
+            status=status.HTTP_202_ACCEPTED
         )
-    
+
     except Exception as e:
         return Response(
             {"error": True, "detail": str(e)},
@@ -585,25 +584,44 @@ def get_outlet_creds(request, outlet_id):
 
 @swagger_auto_schema(
     method='get',
-    responses={200: ProductSerializer(many=True), 404: 'No products found for this outlet'},
-    operation_description="Retrieve the products for a specific outlet by outlet ID."
+    responses={
+        200: ProductSerializer(many=True),
+        304: 'Not Modified: catalog unchanged since the ETag sent in If-None-Match',
+        404: 'No products found for this outlet',
+    },
+    operation_description=(
+        "Retrieve the products for a specific outlet by outlet ID. The unfiltered catalog carries an ETag; "
+        "send it back in If-None-Match to get a 304 when the catalog has not changed."
+    )
 )
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_products_for_outlet(request, outlet_id):
     try:
+        # Optional search query and filter by category name
+        search_query = request.query_params.get('search')
+        category_query = request.query_params.get('category')
+
+        if not search_query and not category_query:
+            # The full catalog is served from the outlet's snapshot; If-None-Match gets a 304
+            def build():
+                products = Product.objects.filter(outlets=Outlet.objects.get(id=outlet_id)).select_related('category')
+                if not products:
+                    return None
+                return {"error": False, "products": ProductSerializer(products, many=True).data}
+
+            response = catalog_response(request, 'panel_products', outlet_id, build)
+            if response is not None:
+                return response
+
         outlet = Outlet.objects.get(id=outlet_id)
         
         # Fetch products linked to this outlet
-        products = Product.objects.filter(outlets=outlet)
+        products = Product.objects.filter(outlets=outlet).select_related('category')
 
-        # Optional search query
-        search_query = request.query_params.get('search')
         if search_query:
             products = products.filter(item_name__icontains=search_query)
             
-        # Optional filter by category name
-        category_query = request.query_params.get('category')
         if category_query:
             products = products.filter(category__name__icontains=category_query)
 
@@ -691,7 +709,7 @@ def delete_product(request, product_id):
 @swagger_auto_schema(
     method='get',
     operation_summary="Retrieve Orders by Outlet",
-    operation_description="Retrieve a list of all orders for a specific outlet with optional filters for date and customer phone number.",
+    operation_description="Retrieve the orders of a specific outlet, newest first, with optional filters for date and customer phone number. Results are paginated; pass the `next` value back as `cursor` to get the following page.",
     manual_parameters=[
         openapi.Parameter(
             'start_date',
@@ -713,6 +731,18 @@ def delete_product(request, product_id):
             description="Filter orders by the customer's phone number.",
             type=openapi.TYPE_STRING,
         ),
+        openapi.Parameter(
+            'page_size',
+            openapi.IN_QUERY,
+            description=f"Orders per page (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE}).",
+            type=openapi.TYPE_INTEGER,
+        ),
+        openapi.Parameter(
+            'cursor',
+            openapi.IN_QUERY,
+            description="The `next` value of the previous page. Omit it for the newest orders.",
+            type=openapi.TYPE_STRING,
+        ),
     ],
     responses={
         200: openapi.Response(
@@ -733,7 +763,9 @@ def delete_product(request, product_id):
                             "total_igst": "0.00",
                             "mode_of_payment": "CASH"
                         }
-                    ]
+                    ],
+                    "page_size": 100,
+                    "next": "WyIyMDI0LTEyLTAxIiwgNDJd"
                 }
             }
         ),
@@ -785,17 +817,26 @@ def get_orders_by_outlet(request, outlet_id):
                     "detail": "No orders found for the given customer phone number."
                 }, status=status.HTTP_404_NOT_FOUND)
         
-        # Query orders with applied filters
-        orders = Order.objects.filter(filters).order_by('-date_of_billing')
+        # Query one page of orders with applied filters (newest first)
+        orders, page_size, next_cursor = paginate_orders(
+            OrderSerializer.setup_eager_loading(Order.objects.filter(filters)), request.query_params
+        )
 
         # Serialize results
         serializer = OrderSerializer(orders, many=True)
 
         return Response({
             "error": False,
-            "orders": serializer.data
+            "orders": serializer.data,
+            "page_size": page_size,
+            "next": next_cursor
         }, status=status.HTTP_200_OK)
 
+    except InvalidPageRequest as e:
+        return Response({
+            "error": True,
+            "detail": str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Outlet.DoesNotExist:
         return Response({
             "error": True,
@@ -822,11 +863,214 @@ def get_orders_by_outlet(request, outlet_id):
 
 
 
+@swagger_auto_schema(
+    method='get',
+    operation_summary="Export Orders",
+    operation_description=(
+        "Download an outlet's orders for a date range with one row per order line. "
+        "CSV is streamed as it is read from the database; xlsx is built in openpyxl's write-only mode."
+    ),
+    manual_parameters=[
+        openapi.Parameter('start_date', openapi.IN_QUERY, description="First billing date (YYYY-MM-DD).", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+        openapi.Parameter('end_date', openapi.IN_QUERY, description="Last billing date (YYYY-MM-DD).", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+        openapi.Parameter('file_type', openapi.IN_QUERY, description="csv (default) or xlsx.", type=openapi.TYPE_STRING, enum=["csv", "xlsx"]),
+    ],
+    responses={
+        200: 'Export file',
+        400: 'Bad Request: Invalid date or file type',
+        404: 'Not Found: Outlet not found',
+    },
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def export_orders(request, outlet_id):
+    try:
+        outlet = Outlet.objects.get(id=outlet_id)
+
+        start_date = parse_export_date(request.query_params.get('start_date'), 'start_date')
+        end_date = parse_export_date(request.query_params.get('end_date'), 'end_date')
+        file_type = request.query_params.get('file_type', 'csv').lower()
+        if file_type not in ('csv', 'xlsx'):
+            raise InvalidExportRequest('file_type must be csv or xlsx')
+
+        rows = export_rows(outlet.id, start_date, end_date)
+        filename = f"orders_{outlet.id}_{start_date or 'start'}_{end_date or 'today'}.{file_type}"
+
+        if file_type == 'xlsx':
+            return xlsx_export_response(rows, filename)
+        return csv_export_response(rows, filename)
+
+    except Outlet.DoesNotExist:
+        return Response({"error": True, "detail": "Outlet not found."}, status=status.HTTP_404_NOT_FOUND)
+    except InvalidExportRequest as e:
+        return Response({"error": True, "detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({"error": True, "detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_summary="Sales Dashboard",
+    operation_description="Today / this week / this month sales per outlet, served from the daily sales rollup.",
+    manual_parameters=[
+        openapi.Parameter('outlet_id', openapi.IN_QUERY, description="Only this outlet.", type=openapi.TYPE_INTEGER),
+    ],
+    responses={
+        200: openapi.Response(
+            description="Sales per outlet and period.",
+            examples={
+                "application/json": {
+                    "error": False,
+                    "outlets": [
+                        {
+                            "outlet_id": 1,
+                            "today": {"order_count": 12, "item_count": 40, "gross": "4200.00", "discount": "210.00",
+                                      "net": "3990.00", "cgst": "304.32", "sgst": "304.32", "igst": "0.00"},
+                            "week": {"order_count": 60, "item_count": 190, "gross": "21000.00", "discount": "900.00",
+                                     "net": "20100.00", "cgst": "1533.05", "sgst": "1533.05", "igst": "0.00"},
+                            "month": {"order_count": 200, "item_count": 640, "gross": "70000.00", "discount": "2800.00",
+                                      "net": "67200.00", "cgst": "5125.42", "sgst": "5125.42", "igst": "0.00"}
+                        }
+                    ]
+                }
+            }
+        ),
+        400: 'Bad Request: Invalid outlet_id',
+    },
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def sales_dashboard_view(request):
+    try:
+        outlet_id = request.query_params.get('outlet_id')
+        if outlet_id and not outlet_id.isdigit():
+            return Response({"error": True, "detail": "Invalid outlet_id."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "error": False,
+            "outlets": sales_dashboard(int(outlet_id) if outlet_id else None)
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({"error": True, "detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_summary="GSTR-1 Report",
+    operation_description=(
+        "GSTR-1 style report of an outlet's orders for a month: B2B invoices (customers with a GSTIN), "
+        "B2C totals per place of supply and an HSN-wise quantity / value / tax summary."
+    ),
+    manual_parameters=[
+        openapi.Parameter('month', openapi.IN_QUERY, description="Return period (YYYY-MM).", type=openapi.TYPE_STRING, required=True),
+        openapi.Parameter('file_type', openapi.IN_QUERY, description="json (default) or xlsx.", type=openapi.TYPE_STRING, enum=["json", "xlsx"]),
+    ],
+    responses={
+        200: 'Report',
+        400: 'Bad Request: Invalid month or file type',
+        404: 'Not Found: Outlet not found',
+    },
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def gstr1_report_view(request, outlet_id):
+    try:
+        outlet = Outlet.objects.get(id=outlet_id)
+        start_date, end_date = parse_report_month(request.query_params.get('month'))
+
+        file_type = request.query_params.get('file_type', 'json').lower()
+        if file_type not in ('json', 'xlsx'):
+            return Response({"error": True, "detail": "file_type must be json or xlsx"}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = gstr1_report(outlet.id, start_date, end_date)
+
+        if file_type == 'xlsx':
+            return gstr1_xlsx_response(report, f"gstr1_{outlet.id}_{start_date:%Y_%m}.xlsx")
+        return Response({"error": False, "report": report}, status=status.HTTP_200_OK)
+
+    except Outlet.DoesNotExist:
+        return Response({"error": True, "detail": "Outlet not found."}, status=status.HTTP_404_NOT_FOUND)
+    except InvalidReportPeriod as e:
+        return Response({"error": True, "detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({"error": True, "detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_summary="Background job status",
+    operation_description="Status and progress of a background job (import, export, report). `result` is filled in once it succeeds.",
+    responses={200: 'Job status', 404: 'Not Found: Job not found'},
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def job_status_view(request, job_id):
+    try:
+        job = Job.objects.get(id=job_id)
+        return Response({"error": False, "job": job_status(job)}, status=status.HTTP_200_OK)
+    except Job.DoesNotExist:
+        return Response({"error": True, "detail": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({"error": True, "detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_summary="List background jobs",
+    operation_description=f"The {JOB_LIST_LIMIT} most recent background jobs, newest first, without their results.",
+    manual_parameters=[
+        openapi.Parameter('kind', openapi.IN_QUERY, description="Only jobs of this kind, e.g. import_products.", type=openapi.TYPE_STRING),
+        openapi.Parameter('status', openapi.IN_QUERY, description="Only jobs in this status.", type=openapi.TYPE_STRING, enum=[value for value, _ in Job.STATUSES]),
+    ],
+    responses={200: 'Jobs'},
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def list_jobs(request):
+    try:
+        jobs = Job.objects.defer('result', 'checkpoint').order_by('-created_at', '-id')
+
+        kind = request.query_params.get('kind')
+        if kind:
+            jobs = jobs.filter(kind=kind)
+        job_state = request.query_params.get('status')
+        if job_state:
+            jobs = jobs.filter(status=job_state)
+
+        return Response({
+            "error": False,
+            "jobs": [job_status(job, with_result=False) for job in jobs[:JOB_LIST_LIMIT]],
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({"error": True, "detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+
+
+
 @api_view(['GET'])
 def get_order_details(request, order_number):
     try:
         # Fetch the order by order_number
-        order = Order.objects.prefetch_related('order_items', 'customer').get(order_number=order_number)
+        order = OrderSerializer.setup_eager_loading(Order.objects.all()).get(order_number=order_number)
         serializer = OrderSerializer(order)
         
         return Response({
@@ -907,6 +1151,11 @@ def get_order_details(request, order_number):
 @permission_classes([AllowAny])
 def generate_bill(request, order_number):
     try:
+        # Reprints are served straight from the bill cache
+        html = get_cached_bill(order_number)
+        if html is not None:
+            return HttpResponse(html)
+
         # Fetch the order and related data
         order = Order.objects.select_related('customer', 'outlet').get(order_number=order_number)
         order_items = OrderItem.objects.filter(order=order).select_related('product')
@@ -914,78 +1163,9 @@ def generate_bill(request, order_number):
         if not order_items.exists():
             return JsonResponse({'error': True, 'detail': 'No items found in the order'}, status=404)
 
-        # Get HSN code from the first product
-        # first_product = order_items.first().product
-        # hsn_code = first_product.hsn_sac_code if first_product.hsn_sac_code else "N/A"
-
-        # Calculate totals
-        total_quantity = sum(item.quantity for item in order_items)
-        total_discount = Decimal(order.total_amount) * (Decimal(order.discount_percentage) / Decimal(100)) if order.discount_percentage > 0 else Decimal(0)
-        net_amount = Decimal(order.total_amount) - total_discount
-        sgst = Decimal(order.total_sgst or 0)
-        cgst = Decimal(order.total_cgst or 0)
-        igst = Decimal(order.total_igst or 0)
-
-        # Calculate round-off and grand total
-        calculated_total = net_amount
-        rounded_total = calculated_total.quantize(Decimal('1'), rounding="ROUND_HALF_UP")
-        round_off = rounded_total - calculated_total
-        grand_amount = rounded_total
-
-        # Convert grand total to words
-        total_in_words = num2words(grand_amount, to='currency', currency='INR', lang='en_IN').replace(", zero paise", "").replace("-", " ").replace(",", "").title()
-
-        # UPI details and QR Code
-        upi_id = "vyapar.171035825947@hdfcbank"
-        name = "Laundry Talks"
-        upi_url = f"upi://pay?pa={upi_id}&pn={name}"
-        qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
-        qr.add_data(upi_url)
-        qr.make(fit=True)
-        qr_img = qr.make_image(fill_color="black", back_color="white")
-
-        # Convert QR code image to base64
-        qr_buffer = BytesIO()
-        qr_img.save(qr_buffer)
-        qr_buffer.seek(0)
-        qr_base64 = base64.b64encode(qr_buffer.getvalue()).decode('utf-8')
-
-        # Prepare context for rendering
-        context = {
-            "customer_name": order.customer.name if order.customer else "Walk-in Customer",
-            "billing_date": order.date_of_billing.strftime('%Y-%m-%d'),
-            "customer_address": order.customer.address if order.customer else "Not Provided",
-            "invoice_number": order.invoice_number,
-            "customer_phone": order.customer.phone_number if order.customer else "Not Provided",
-            "reference": order.customer.reference if order.customer else "N/A",
-            "gst_number": order.customer.gst_number if order.customer else "Not Provided",
-            "collection_date": order.date_of_collection.strftime('%Y-%m-%d') if order.date_of_collection else "Not Provided",
-            "items": [
-                {
-                    "description": item.product.item_name,
-                    "hanger": item.hanger,  # Include the hanger value
-                    "hsn_code": item.product.hsn_sac_code if hasattr(item.product, "hsn_sac_code") else " ",
-                    "quantity": item.quantity,
-                    "rate": round(item.product.rate_per_unit, 2),
-                    "total": round(item.total, 2),
-                } for item in order_items
-            ],
-            "total_quantity": total_quantity,
-            "total_amount": "{:.2f}".format(order.total_amount),
-            "discount_percentage": "{:.2f}".format(order.discount_percentage) if order.discount_percentage > 0 else "0.00",
-            "discount": "{:.2f}".format(total_discount),
-            "net_amount": "{:.2f}".format(net_amount),
-            "sgst": "{:.2f}".format(sgst) if sgst > 0 else None,
-            "cgst": "{:.2f}".format(cgst) if cgst > 0 else None,
-            "igst": "{:.2f}".format(igst) if igst > 0 else None,
-            "round_off": "{:.2f}".format(round_off),
-            "grand_amount": "{:.2f}".format(grand_amount),
-            "total_in_words": total_in_words + " Only.",
-            "qr_code": qr_base64
-        }
-
-        # Render the template with the context
-        return render(request, "bill.html", context)
+        # Render the template and cache it for the next reprint
+        html, context = render_bill(order, order_items)
+        return HttpResponse(html)
 
     except Order.DoesNotExist:
         return JsonResponse({'error': True, 'detail': 'Order not found'}, status=404)
@@ -1090,46 +1270,38 @@ def update_order_discount(request, outlet_id, order_number,user_id):
         except Outlet.DoesNotExist:
             return Response({'error': True, 'detail': 'Outlet not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        # Validate order
-        try:
-            order = Order.objects.get(order_number=order_number, outlet=outlet)
-        except Order.DoesNotExist:
-            return Response({'error': True, 'detail': 'Order not found'}, status=status.HTTP_404_NOT_FOUND)
-
         # Extract new discount percentage from request body
         data = request.data
         new_discount_percentage = Decimal(data.get('discount_percentage', 0.0)).quantize(Decimal('0.00'))
 
-        # Recalculate totals
-        total_amount = sum(item.total for item in order.order_items.all())
-        total_after_discount = total_amount - (total_amount * (new_discount_percentage / Decimal('100')))
+        with transaction.atomic():
+            # Lock the order so a concurrent edit cannot price or roll up from the same starting point
+            try:
+                order = Order.objects.select_for_update(of=('self',)).select_related('customer').get(
+                    order_number=order_number, outlet=outlet
+                )
+            except Order.DoesNotExist:
+                return Response({'error': True, 'detail': 'Order not found'}, status=status.HTTP_404_NOT_FOUND)
+
+            order_items = list(order.order_items.all())
+            item_count = sum(item.quantity for item in order_items)
+            sales_before = sales_snapshot(order, item_count)
+
+            # Recalculate totals (GST is included in the prices, as when the order was placed)
+            price = price_order(
+                [item.total for item in order_items],
+                new_discount_percentage,
+                order.customer.state if order.customer else "",
+            )
 
-        # Determine GST type
-        customer_state = order.customer.state.lower() if order.customer and order.customer.state else ""
-        is_uttar_pradesh = (customer_state == "uttar pradesh")
+            # Update order fields
+            order.discount_percentage = new_discount_percentage
+            apply_price(order, price)
+            order.save(update_fields=['discount_percentage', *REPRICED_FIELDS])
+            bump_bill_version(order)  # New bill version; drops the cached bill
 
-        if is_uttar_pradesh:
-            cgst = total_after_discount * (Decimal('9') / Decimal('100'))
-            sgst = total_after_discount * (Decimal('9') / Decimal('100'))
-            igst = Decimal('0.00')
-        else:
-            cgst = Decimal('0.00')
-            sgst = Decimal('0.00')
-            igst = total_after_discount * (Decimal('18') / Decimal('100'))
-
-        # Final total with GST
-        total_gst = (cgst + sgst + igst).quantize(Decimal('0.00'))
-        total_after_gst = (total_after_discount + total_gst).quantize(Decimal('0.00'))
-
-        # Update order fields
-        order.discount_percentage = new_discount_percentage
-        order.total_after_discount = total_after_discount.quantize(Decimal('0.00'))
-        order.total_gst = total_gst
-        order.total_cgst = cgst.quantize(Decimal('0.00'))
-        order.total_sgst = sgst.quantize(Decimal('0.00'))
-        order.total_igst = igst.quantize(Decimal('0.00'))
-        order.total_after_gst = total_after_gst
-        order.save()
+            # Move the order's contribution in the daily sales rollup along with it
+            apply_sales_change(sales_before, sales_snapshot(order, item_count))
 
         return Response({'error': False, 'detail': 'Order updated successfully', 'order_number': order.order_number})
 
@@ -1348,7 +1520,7 @@ def get_customers_by_outlet(request, outlet_id):
         search_query = request.query_params.get('search')
 
         # Filter by outlet
-        customers = Customer.objects.filter(outlet_id=outlet_id)
+        customers = Customer.objects.filter(outlet_id=outlet_id).select_related('outlet')
 
         # Apply search filter
         if search_query:
@@ -1411,6 +1583,100 @@ def get_customers_by_outlet(request, outlet_id):
 
 
 
+@swagger_auto_schema(
+    method='post',
+    operation_summary="Bulk import customers (CSV or Excel)",
+    operation_description=(
+        "Upsert an outlet's customers from a .csv or .xlsx file with a header row "
+        "(name, phone_number, state, gst_number, address, reference). Phone numbers are normalized "
+        "to 10 digits and existing customers of the outlet are updated. The file is imported by a "
+        "background job; its result lists the rows that failed with their row number and errors."
+    ),
+    manual_parameters=[
+        openapi.Parameter('file', openapi.IN_FORM, description="CSV or xlsx file", type=openapi.TYPE_FILE, required=True),
+    ],
+    responses={
+        202: 'Import queued; poll status_url for progress and the report',
+        400: 'Bad Request: Missing file or unsupported file type',
+        404: 'Not Found: Outlet not found',
+    },
+)
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def import_customers_view(request, outlet_id):
+    try:
+        outlet = Outlet.objects.get(id=outlet_id)
+
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({"error": True, "detail": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not upload.name.lower().endswith(IMPORT_FILE_TYPES):
+            return Response({"error": True, "detail": "Upload a .csv or .xlsx file."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Imported by the run_jobs worker; the report ends up in the job's result
+        job = enqueue_job("import_customers", {"outlet_id": outlet.id}, upload)
+
+        return Response({
+            "error": False,
+            "detail": "Customer import queued",
+            "job_id": job.id,
+            "status_url": reverse('job_status', args=[job.id]),
+        }, status=status.HTTP_202_ACCEPTED)
+
+    except Outlet.DoesNotExist:
+        return Response({"error": True, "detail": "Outlet not found."}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({"error": True, "detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_summary="Typeahead customer search",
+    operation_description=(
+        "Ranked search of an outlet's customers by name words and phone digits, served from the "
+        "customer search index. Every query word must prefix-match a name word or part of the phone number."
+    ),
+    manual_parameters=[
+        openapi.Parameter('q', openapi.IN_QUERY, description="Search text (name and/or phone digits).", type=openapi.TYPE_STRING, required=True),
+        openapi.Parameter('page', openapi.IN_QUERY, description="Page number (1-based).", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('page_size', openapi.IN_QUERY, description=f"Results per page (max {SEARCH_MAX_PAGE_SIZE}).", type=openapi.TYPE_INTEGER),
+    ],
+    responses={
+        200: 'Matching customers, best first',
+        400: 'Bad Request: Query too short or invalid paging',
+    },
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def search_customers_view(request, outlet_id):
+    try:
+        page, page_size = parse_search_page(request.query_params)
+        customers, total = search_customers(outlet_id, request.query_params.get('q'), page, page_size)
+
+        return Response({
+            "error": False,
+            "customers": customers,
+            "count": total,  # capped at the top SEARCH_MAX_RESULTS matches
+            "page": page,
+            "page_size": page_size,
+            "has_next": page * page_size < total,
+        }, status=status.HTTP_200_OK)
+
+    except InvalidSearchRequest as e:
+        return Response({"error": True, "detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({"error": True, "detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+
+
+
 @swagger_auto_schema(
     method='patch',
     request_body=CustomerUpdateSerializer,